@@ -0,0 +1,72 @@
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from datetime import datetime, timezone
+import subprocess
+import platform
+import json
+import os
+
+from benchmarks.environment import setup_environment, use_fakeredis
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = ArgumentParser(prog="python -m benchmarks", description="Run micro-benchmarks and the local load driver.")
+    parser.add_argument("--redis-url", help="use a local redis-server instead of fakeredis")
+    parser.add_argument("--iterations", type=int, default=200, help="requests per route in the load driver")
+    parser.add_argument("--number", type=int, default=2000, help="calls per micro-benchmark")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--only", choices=("micro", "load", "serialization", "uploads"))
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args()
+
+    redis_backend = setup_environment(args.redis_url, args.bcrypt_rounds)
+
+    with nullcontext() if args.redis_url else use_fakeredis():
+        run(args, redis_backend)
+
+
+def run(args, redis_backend: str):
+    from benchmarks import micro, load, serialization, uploads
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "redis": redis_backend,
+            "database": "sqlite",
+            "bcrypt_rounds": int(os.environ["BCRYPT_ROUNDS"]),
+            "iterations": args.iterations,
+            "number": args.number
+        }
+    }
+
+    if args.only in (None, "micro"):
+        print("== micro-benchmarks ==")
+        results["micro"] = micro.run(number=args.number)
+    if args.only in (None, "serialization"):
+        print("== serialization ==")
+        results["serialization"] = serialization.run(number=args.number)
+    if args.only in (None, "uploads"):
+        print("== uploads ==")
+        results["uploads"] = uploads.run()
+    if args.only in (None, "load"):
+        print("== load driver ==")
+        results["load"] = load.run(iterations=args.iterations)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
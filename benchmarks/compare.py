@@ -0,0 +1,26 @@
+from typing import Any, Dict
+import json
+import sys
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]):
+    print(f"{'benchmark':<48} {'p50 ms':^20}{'p99 ms':^20}{'change':>8}")
+    for section in ("micro", "load"):
+        for name, before in baseline.get(section, {}).items():
+            after = candidate.get(section, {}).get(name)
+            if not after:
+                continue
+            change = (after["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+            print(f"{section + ' ' + name:<48} {before['p50_ms']:8.3f} -> {after['p50_ms']:<8.3f}"
+                  f"{before['p99_ms']:8.3f} -> {after['p99_ms']:<8.3f}{change:+8.1%}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m benchmarks.compare <baseline.json> <candidate.json>")
+    compare(load_results(sys.argv[1]), load_results(sys.argv[2]))
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from tempfile import mkdtemp
+from typing import Iterator, Optional
+import os
+
+
+def setup_environment(redis_url: Optional[str] = None, bcrypt_rounds: int = 10) -> str:
+    workdir = mkdtemp(prefix="bench-")
+
+    os.environ.setdefault("DATABASE_URI", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("BCRYPT_ROUNDS", str(bcrypt_rounds))
+    os.environ.setdefault("STORAGE_BACKEND", "local")
+    os.environ.setdefault("LOCAL_STORAGE_DIR", os.path.join(workdir, "avatars"))
+    os.environ.setdefault("UPLOAD_SPOOL_DIR", workdir)
+    os.environ.setdefault("UPLOAD_QUEUE_LIMIT", "100000")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("METRICS_ENABLED", "true")
+
+    if redis_url:
+        os.environ["REDIS_URI"] = redis_url
+        return "redis"
+
+    os.environ["REDIS_URI"] = "redis://fakeredis/0"
+    return "fakeredis"
+
+
+@contextmanager
+def use_fakeredis() -> Iterator[object]:
+    import fakeredis
+    import redis
+
+    original_class_from_url = redis.Redis.__dict__["from_url"]
+    original_from_url = redis.from_url
+    server = fakeredis.FakeServer()
+    fake_classes = {}
+
+    def fake_class(cls):
+        if cls in (redis.Redis, redis.StrictRedis):
+            return fakeredis.FakeRedis
+        if cls not in fake_classes:
+            fake_classes[cls] = type(f"Fake{cls.__name__}", (cls, fakeredis.FakeRedis), {})
+        return fake_classes[cls]
+
+    def from_url(cls, url, **kwargs):
+        return fake_class(cls)(server=server)
+
+    redis.Redis.from_url = classmethod(from_url)
+    redis.from_url = lambda url, **kwargs: fakeredis.FakeRedis(server=server)
+    try:
+        yield server
+    finally:
+        redis.Redis.from_url = original_class_from_url
+        redis.from_url = original_from_url
@@ -0,0 +1,142 @@
+from io import BytesIO
+from tempfile import mkstemp
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+from PIL import Image
+import eventlet
+import os
+
+from benchmarks.stats import summarize, report
+
+
+PASSWORDS = ("Passw0rd", "Passw0rd2")
+
+
+def sample_avatar(size: int = 256) -> bytes:
+    buffer = BytesIO()
+    Image.radial_gradient("L").resize((size, size)).convert("RGB").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def drive(prepare: Callable[[int], Callable], iterations: int) -> Dict[str, Any]:
+    timings: List[float] = []
+    statuses: List[Any] = []
+    for index in range(iterations):
+        request = prepare(index)
+        started = perf_counter()
+        response = request()
+        timings.append(perf_counter() - started)
+        statuses.append(getattr(response, "status_code", response))
+        eventlet.sleep(0)
+    return summarize(timings, statuses)
+
+
+def run(iterations: int = 200) -> Dict[str, Any]:
+    from src.app import app, socketio
+    from src.models.user import User
+    from src.utils.storage import storage
+    from src.utils.helpers import store_to_redis
+    from src.utils.schema import serialize_user
+
+    avatar = sample_avatar()
+    sequence = iter(range(10 ** 9))
+
+    def new_client() -> Tuple[Any, str]:
+        session_client = app.test_client()
+        email = f"bench-{next(sequence)}@example.com"
+        session_client.post("/api/user/register", json={"email": email, "password": PASSWORDS[0]})
+        session_client.post("/api/user/login", json={"email": email, "password": PASSWORDS[0]})
+        return session_client, email
+
+    client, email = new_client()
+    anonymous = app.test_client()
+    job_id = client.patch("/api/user/update-image",
+                          data={"image": (BytesIO(avatar), "avatar.png")}).get_json()["data"]["job_id"]
+
+    descriptor, avatar_path = mkstemp(suffix=".png")
+    with os.fdopen(descriptor, "wb") as avatar_file:
+        avatar_file.write(avatar)
+    saved = storage.save(avatar_path)
+
+    def prepare_register(index: int) -> Callable:
+        payload = {"email": f"register-{next(sequence)}@example.com", "password": PASSWORDS[0]}
+        return lambda: anonymous.post("/api/user/register", json=payload)
+
+    def prepare_update_profile(index: int) -> Callable:
+        payload = {"name": f"Bench {index % 2}", "username": f"bench-{index % 2}", "gender": "Other", "bio": "Bench"}
+        return lambda: client.patch("/api/user/update-profile", json=payload)
+
+    def prepare_change_password(index: int) -> Callable:
+        payload = {"old_password": PASSWORDS[index % 2], "new_password": PASSWORDS[1 - index % 2]}
+        return lambda: client.patch("/api/user/change-password", json=payload)
+
+    def prepare_update_image(index: int) -> Callable:
+        upload = BytesIO(avatar)
+        return lambda: client.patch("/api/user/update-image", data={"image": (upload, "avatar.png")})
+
+    def prepare_delete_image(index: int) -> Callable:
+        session_client, _ = new_client()
+        uid = session_client.get("/api/user/user-information").get_json()["data"]["id"]
+        storage.save(avatar_path)
+        with app.app_context():
+            row = User.update_user(id=uid, data={"image": saved["url"], "image_id": saved["object_id"]})
+            store_to_redis("user", uid, serialize_user(row), invalidate=True)
+        return lambda: session_client.delete("/api/user/delete-image")
+
+    def prepare_logout(index: int) -> Callable:
+        session_client, _ = new_client()
+        return lambda: session_client.get("/api/user/logout")
+
+    etag = saved["object_id"].split(".")[0]
+    scenarios = {
+        "GET /": lambda i: lambda: anonymous.get("/"),
+        "POST /api/user/register": prepare_register,
+        "POST /api/user/login": lambda i: lambda: anonymous.post(
+            "/api/user/login", json={"email": email, "password": PASSWORDS[0]}),
+        "GET /api/user/user-information": lambda i: lambda: client.get("/api/user/user-information"),
+        "PATCH /api/user/update-profile": prepare_update_profile,
+        "PATCH /api/user/change-password": prepare_change_password,
+        "PATCH /api/user/update-image": prepare_update_image,
+        "GET /api/user/image-jobs/<job_id>": lambda i: lambda: client.get(f"/api/user/image-jobs/{job_id}"),
+        "GET /media/avatars/<object_id>": lambda i: lambda: anonymous.get(saved["url"]),
+        "GET /media/avatars/<object_id> (304)": lambda i: lambda: anonymous.get(
+            saved["url"], headers={"If-None-Match": f'"{etag}"'}),
+        "DELETE /api/user/delete-image": prepare_delete_image,
+        "GET /metrics": lambda i: lambda: anonymous.get("/metrics"),
+        "GET /api/user/logout": prepare_logout
+    }
+
+    results = {}
+    try:
+        for name, prepare in scenarios.items():
+            results[name] = drive(prepare, iterations)
+            report(name, results[name])
+    finally:
+        os.remove(avatar_path)
+
+    results.update(run_socket_churn(app, socketio, client, iterations))
+    return results
+
+
+def run_socket_churn(app, socketio, client, iterations: int) -> Dict[str, Any]:
+    connects, disconnects, churns = [], [], []
+
+    for _ in range(iterations):
+        started = perf_counter()
+        socket_client = socketio.test_client(app, flask_test_client=client)
+        connected = perf_counter()
+        socket_client.disconnect()
+        finished = perf_counter()
+        connects.append(connected - started)
+        disconnects.append(finished - connected)
+        churns.append(finished - started)
+        eventlet.sleep(0)
+
+    results = {
+        "socketio connect": summarize(connects),
+        "socketio disconnect": summarize(disconnects),
+        "socketio connect+disconnect": summarize(churns)
+    }
+    for name, result in results.items():
+        report(name, result)
+    return results
@@ -0,0 +1,51 @@
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional
+from uuid import uuid4
+
+from benchmarks.stats import summarize, report
+
+
+def measure(func: Callable, number: int, setup: Optional[Callable] = None) -> Dict[str, Any]:
+    timings = []
+    for index in range(number):
+        if setup:
+            setup(index)
+        started = perf_counter()
+        func(index)
+        timings.append(perf_counter() - started)
+    return summarize(timings)
+
+
+def run(number: int = 2000, hash_number: int = 10) -> Dict[str, Any]:
+    from src.utils.hashing import generate_hash, verify_hash
+    from src.utils.schema import user_data_schema, serialize_user
+    from src.utils.helpers import (store_to_redis, retrieve_from_redis, local_cache, add_user_sockets,
+                                   get_user_sockets, remove_socket_by_sid, count_connected_users, get_node_sockets)
+    from benchmarks.serialization import sample_users, USER_PAYLOAD
+
+    user = sample_users()[0]
+    hashed = generate_hash("Passw0rd")
+    user_ids = [str(uuid4()) for _ in range(number)]
+    socket_ids = [uuid4().hex for _ in range(number)]
+
+    cases = {
+        "generate_hash": (lambda i: generate_hash("Passw0rd"), hash_number, None),
+        "verify_hash": (lambda i: verify_hash("Passw0rd", hashed), hash_number, None),
+        "UserDataSchema.dump": (lambda i: user_data_schema.dump(user), number, None),
+        "serialize_user": (lambda i: serialize_user(user), number, None),
+        "store_to_redis": (lambda i: store_to_redis("user", user_ids[i], USER_PAYLOAD), number, None),
+        "retrieve_from_redis (local)": (lambda i: retrieve_from_redis("user", user_ids[i]), number, None),
+        "retrieve_from_redis (redis)": (lambda i: retrieve_from_redis("user", user_ids[i]), number,
+                                        lambda i: local_cache.delete(f"user:{user_ids[i]}")),
+        "add_user_sockets": (lambda i: add_user_sockets(user_ids[i % 100], socket_ids[i]), number, None),
+        "get_user_sockets": (lambda i: get_user_sockets(user_ids[i % 100]), number, None),
+        "count_connected_users": (lambda i: count_connected_users(), number, None),
+        "get_node_sockets": (lambda i: get_node_sockets(), min(number, 200), None),
+        "remove_socket_by_sid": (lambda i: remove_socket_by_sid(socket_ids[i]), number, None)
+    }
+
+    results = {}
+    for name, (func, count, setup) in cases.items():
+        results[name] = measure(func, count, setup)
+        report(name, results[name], "ops/s")
+    return results
@@ -0,0 +1,155 @@
+from argparse import ArgumentParser, SUPPRESS
+from threading import Event, Thread
+from typing import Any, Dict, Optional, Tuple
+import subprocess
+import socket
+import time
+import sys
+import os
+
+from benchmarks.environment import setup_environment
+
+
+EVENT = "multinode-check"
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_fake_redis() -> Tuple[str, object]:
+    import fakeredis
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return f"redis://{host}:{port}/0", server
+
+
+def serve(port: int):
+    import eventlet
+    eventlet.monkey_patch()
+
+    from src.app import app, socketio
+    from src.utils.response import ApiResponse
+    from src.utils.helpers import NODE_ID, emit_to_user
+
+    @app.route("/_multinode/node", methods=["GET"])
+    def multinode_node():
+        return ApiResponse(200, "Node!", {"node": NODE_ID})
+
+    @app.route("/_multinode/emit/<user_id>", methods=["POST"])
+    def multinode_emit(user_id):
+        return ApiResponse(200, "Emitted!", {"node": NODE_ID, "sockets": emit_to_user(user_id, EVENT, {"node": NODE_ID})})
+
+    socketio.run(app=app, host="127.0.0.1", port=port)
+
+
+def start_node(port: int, log_path: str) -> subprocess.Popen:
+    log_file = open(log_path, "w")
+    node = subprocess.Popen([sys.executable, "-m", "benchmarks.multinode", "--serve", str(port)],
+                            stdout=log_file, stderr=subprocess.STDOUT, env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    node.log_path = log_path
+    return node
+
+
+def wait_ready(base_url: str, node: subprocess.Popen, timeout: float = 30.0):
+    import requests
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if node.poll() is not None:
+            break
+        try:
+            if requests.get(base_url, timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    with open(node.log_path) as log_file:
+        print(log_file.read())
+    raise RuntimeError(f"Node at {base_url} did not start")
+
+
+def check_delivery(http, user_id: str, listen_url: str, emit_url: str, timeout: float = 5.0) -> Dict[str, Any]:
+    import socketio
+
+    received, payload = Event(), {}
+    client = socketio.Client(http_session=http, reconnection=False)
+
+    @client.on(EVENT)
+    def on_event(data):
+        payload.update(data)
+        received.set()
+
+    client.connect(listen_url, transports=["polling"], wait_timeout=timeout)
+    try:
+        listener = http.get(f"{listen_url}/_multinode/node", timeout=timeout).json()["data"]["node"]
+        sender = http.post(f"{emit_url}/_multinode/emit/{user_id}", timeout=timeout).json()["data"]
+        delivered = received.wait(timeout)
+    finally:
+        client.disconnect()
+    return {"listener": listener, "sender": sender["node"], "sockets": sender["sockets"],
+            "delivered": delivered and payload.get("node") == sender["node"] and listener != sender["node"]}
+
+
+def run(redis_url: Optional[str] = None) -> bool:
+    import requests
+
+    fake_server = None
+    if redis_url is None:
+        redis_url, fake_server = start_fake_redis()
+    setup_environment(redis_url)
+    os.environ["SOCKETIO_MULTI_NODE"] = "true"
+    workdir = os.path.dirname(os.environ["LOCAL_STORAGE_DIR"])
+
+    nodes, urls = [], []
+    try:
+        for index in range(2):
+            port = free_port()
+            urls.append(f"http://127.0.0.1:{port}")
+            nodes.append(start_node(port, os.path.join(workdir, f"node-{index}.log")))
+            wait_ready(urls[-1], nodes[-1])
+
+        http = requests.Session()
+        credentials = {"email": f"multinode-{time.time_ns()}@example.com", "password": "Passw0rd"}
+        http.post(f"{urls[0]}/api/user/register", json=credentials).raise_for_status()
+        user_id = http.post(f"{urls[0]}/api/user/login", json=credentials).json()["data"]["id"]
+
+        ok = True
+        for listen_url, emit_url in ((urls[0], urls[1]), (urls[1], urls[0])):
+            result = check_delivery(http, user_id, listen_url, emit_url)
+            ok = ok and result["delivered"]
+            print(f"{result['sender']} -> {result['listener']}: delivered={result['delivered']} "
+                  f"sockets={result['sockets']}")
+        return ok
+    finally:
+        for node in nodes:
+            node.terminate()
+            node.wait(10)
+        if fake_server is not None:
+            fake_server.shutdown()
+            fake_server.server_close()
+
+
+def main():
+    parser = ArgumentParser(prog="python -m benchmarks.multinode",
+                            description="Start two Socket.IO nodes on one Redis and check cross-node emit_to_user.")
+    parser.add_argument("--redis-url", help="use a local redis-server instead of an in-process fakeredis server")
+    parser.add_argument("--serve", type=int, help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    ok = run(args.redis_url)
+    print("cross-node delivery OK" if ok else "cross-node delivery FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from datetime import datetime
+from timeit import timeit
+import json
+import msgspec
+
+
+USER_PAYLOAD = {
+    "id": "3f9c2a4e-8b1d-4c7a-9e2f-5a6b7c8d9e0f",
+    "email": "shekhar@example.com",
+    "name": "Shekhar Sharma",
+    "username": "shekharsikku",
+    "gender": "Male",
+    "image": "https://res.cloudinary.com/demo/image/upload/v1/uploads/3f9c2a4e-8b1d-4c7a-9e2f-5a6b7c8d9e0f.png",
+    "bio": "Building things with Flask!",
+    "setup": True,
+    "created_at": "2025-05-01T10:15:30.123456",
+    "updated_at": "2025-05-02T08:00:00.654321"
+}
+
+
+def sample_users():
+    from src.models.user import User
+
+    users = []
+    for setup, image in ((True, USER_PAYLOAD["image"]), (False, None)):
+        user = User(email=USER_PAYLOAD["email"], password="$2b$12$abcdefghijklmnopqrstuuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0")
+        for key, value in USER_PAYLOAD.items():
+            if key not in ("email", "created_at", "updated_at"):
+                setattr(user, key, value)
+        user.image = image
+        user.setup = setup
+        user.created_at = datetime.fromisoformat(USER_PAYLOAD["created_at"])
+        user.updated_at = None if image is None else datetime.fromisoformat(USER_PAYLOAD["updated_at"])
+        users.append(user)
+    return users
+
+
+def run(number: int = 100000):
+    from src.utils.schema import UserProfile, user_data_schema, serialize_user
+
+    user = sample_users()[0]
+
+    encoder = msgspec.msgpack.Encoder()
+    decoder = msgspec.msgpack.Decoder(UserProfile)
+    json_encoder = msgspec.json.Encoder()
+    json_value = json.dumps(USER_PAYLOAD).encode("utf-8")
+    msgpack_value = encoder.encode(USER_PAYLOAD)
+
+    cases = {
+        "json.dumps": lambda: json.dumps(USER_PAYLOAD),
+        "json.loads": lambda: json.loads(json_value.decode("utf-8")),
+        "msgspec.json.encode": lambda: json_encoder.encode(USER_PAYLOAD),
+        "msgspec.msgpack.encode": lambda: encoder.encode(USER_PAYLOAD),
+        "msgspec.msgpack.decode": lambda: msgspec.structs.asdict(decoder.decode(msgpack_value)),
+        "UserDataSchema.dump": lambda: user_data_schema.dump(user),
+        "serialize_user": lambda: serialize_user(user)
+    }
+
+    results = {}
+    for name, case in cases.items():
+        seconds = timeit(case, number=number)
+        results[name] = seconds / number * 1e6
+        print(f"{name:<24} {results[name]:8.3f} us/op")
+
+    results["payload_bytes"] = {"json": len(json_value), "msgpack": len(msgpack_value)}
+    print(f"{'payload bytes':<24} json={len(json_value)} msgpack={len(msgpack_value)}")
+    return results
+
+
+if __name__ == "__main__":
+    from benchmarks.environment import setup_environment, use_fakeredis
+
+    setup_environment()
+    with use_fakeredis():
+        run()
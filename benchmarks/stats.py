@@ -0,0 +1,30 @@
+from collections import Counter
+from typing import Any, Dict, List
+import math
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(timings: List[float], statuses: List[Any] = ()) -> Dict[str, Any]:
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "mean_ms": total / len(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+        "rps": len(ordered) / total if total else 0.0,
+        "status": {str(status): count for status, count in Counter(statuses).items()}
+    }
+
+
+def report(name: str, result: Dict[str, Any], unit: str = "req/s"):
+    status = " ".join(f"{code}x{count}" for code, count in result.get("status", {}).items())
+    print(f"{name:<40} p50 {result['p50_ms']:8.3f} ms  p99 {result['p99_ms']:8.3f} ms  "
+          f"{result['rps']:9.1f} {unit}  {status}")
@@ -0,0 +1,52 @@
+from tempfile import mkstemp
+from time import perf_counter
+from PIL import Image, ImageFilter
+import os
+
+
+def sample_photo(width: int = 4032, height: int = 3024, quality: int = 92) -> str:
+    noise = Image.effect_noise((width // 8, height // 8), 64).filter(ImageFilter.GaussianBlur(2))
+    photo = Image.merge("RGB", (noise.resize((width, height)), Image.linear_gradient("L").resize((width, height)),
+                                Image.radial_gradient("L").resize((width, height))))
+    descriptor, path = mkstemp(prefix="bench-", suffix=".jpg")
+    with os.fdopen(descriptor, "wb") as photo_file:
+        photo.save(photo_file, format="JPEG", quality=quality)
+    return path
+
+
+def run(rounds: int = 5, size: int = 512):
+    from src.utils.uploads import preprocess_image
+
+    path = sample_photo()
+    original_bytes = os.path.getsize(path)
+    results = {}
+
+    try:
+        for image_format in ("WEBP", "JPEG"):
+            timings = []
+            for _ in range(rounds):
+                started = perf_counter()
+                output_path = preprocess_image(path, size, image_format, 80)
+                timings.append(perf_counter() - started)
+                output_bytes = os.path.getsize(output_path)
+                os.remove(output_path)
+
+            results[image_format] = {
+                "original_bytes": original_bytes,
+                "output_bytes": output_bytes,
+                "saved_bytes": original_bytes - output_bytes,
+                "avg_ms": sum(timings) / rounds * 1000
+            }
+            print(f"{image_format:<5} {original_bytes:>9} -> {output_bytes:>7} bytes "
+                  f"({output_bytes / original_bytes:6.2%}) in {results[image_format]['avg_ms']:7.2f} ms")
+    finally:
+        os.remove(path)
+
+    return results
+
+
+if __name__ == "__main__":
+    from benchmarks.environment import setup_environment
+
+    setup_environment()
+    run()
@@ -1,3 +1,6 @@
+import eventlet
+eventlet.monkey_patch()
+
 from logging import basicConfig, DEBUG, INFO
 from src.app import app, socketio
 from src.utils import envs
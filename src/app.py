@@ -1,13 +1,18 @@
 from werkzeug.exceptions import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
 from flask_socketio import SocketIO, emit, send
-from flask import redirect, request
+from flask import redirect, request, session
+from redis import RedisError
 from typing import Dict, Any
 import eventlet
 
 from src.utils.response import ApiResponse
 from src.configs import init_flask_app
-from src.utils import cors
+from src.utils import cors, envs
+from src.utils.metrics import socket_events
+from src.utils.identifiers import identifier_filter, load_identifier_filter, republish_identifiers
+from src.utils.helpers import (add_user_sockets, remove_socket_by_sid, touch_user, refresh_node_presence,
+                               reap_dead_nodes)
 
 
 app = init_flask_app()
@@ -15,7 +20,9 @@ socketio = SocketIO(
     app=app,
     cors_allowed_origins=cors["ALLOWED_ORIGIN"],
     allow_credentials=cors["WITH_CREDENTIAL"],
-    async_mode="eventlet"
+    async_mode="eventlet",
+    message_queue=envs["REDIS_URI"] if envs["SOCKETIO_MULTI_NODE"] else None,
+    channel=envs["SOCKETIO_CHANNEL"]
 )
 
 # Handle root route and basic error/exception
@@ -46,3 +53,56 @@ def handle_generic_exception(error):
 @app.errorhandler(SQLAlchemyError)
 def sqlalchemy_error(error):
     return ApiResponse(500, f"Error: {error}!")
+
+
+# Handle socket connections and presence
+
+
+@socketio.on("connect")
+def handle_connect(auth=None):
+    session_uid = session.get("uid")
+    if not session_uid:
+        socket_events.inc(("rejected",))
+        return False
+    add_user_sockets(session_uid, request.sid)
+    socket_events.inc(("connect",))
+
+
+@socketio.on("disconnect")
+def handle_disconnect(*args):
+    remove_socket_by_sid(request.sid)
+    socket_events.inc(("disconnect",))
+
+
+@socketio.on("heartbeat")
+def handle_heartbeat(*args):
+    session_uid = session.get("uid")
+    if session_uid:
+        touch_user(session_uid)
+
+
+def presence_worker():
+    while True:
+        try:
+            refresh_node_presence()
+            reaped = reap_dead_nodes()
+            if reaped:
+                print(f"Reaped stale sockets from dead nodes: {reaped}")
+        except RedisError as e:
+            print(f"Presence heartbeat error: {e}")
+        socketio.sleep(envs["PRESENCE_HEARTBEAT"])
+
+
+socketio.start_background_task(presence_worker)
+
+
+def identifier_filter_worker():
+    while True:
+        socketio.sleep(5)
+        republish_identifiers()
+        if envs["IDENTIFIER_FILTER_ENABLED"] and identifier_filter.needs_rebuild(envs["IDENTIFIER_FILTER_REBUILD"]):
+            with app.app_context():
+                load_identifier_filter()
+
+
+socketio.start_background_task(identifier_filter_worker)
@@ -1,21 +1,42 @@
 from sqlalchemy.exc import SQLAlchemyError
 from flask_sqlalchemy import SQLAlchemy
-from flask_session import Session
 from sqlalchemy import text
 from flask_cors import CORS
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.retry import Retry
+from datetime import timedelta
 from flask import Flask
 import redis
 import sys
 
 from src.utils import envs, cors
+from src.utils.response import MsgspecJSONProvider
+from src.utils.metrics import InstrumentedRedis, init_metrics
+from src.configs.database import engine_options, pool_snapshot, replica_binds, RoutingSession
+from src.configs.session import LazyRedisSessionInterface
+from src.configs.migrations import upgrade_schema
 
 
-rc = redis.from_url(url=envs["REDIS_URI"])
-db = SQLAlchemy()
+rc = (InstrumentedRedis if envs["METRICS_ENABLED"] else redis.Redis).from_url(
+    url=envs["REDIS_URI"],
+    max_connections=envs["REDIS_MAX_CONNECTIONS"],
+    socket_timeout=envs["REDIS_SOCKET_TIMEOUT"],
+    socket_connect_timeout=envs["REDIS_CONNECT_TIMEOUT"],
+    health_check_interval=envs["REDIS_HEALTH_CHECK_INTERVAL"],
+    retry=Retry(ExponentialWithJitterBackoff(base=envs["REDIS_BACKOFF_BASE"], cap=envs["REDIS_BACKOFF_CAP"]),
+                retries=envs["REDIS_RETRIES"]),
+    retry_on_error=[redis.ConnectionError, redis.TimeoutError]
+)
+db = SQLAlchemy(session_options={"class_": RoutingSession, "expire_on_commit": False})
+
+
+def pool_status():
+    return {bind_key or "default": pool_snapshot(engine.pool) for bind_key, engine in db.engines.items()}
 
 
 def init_flask_app():
     app = Flask(__name__)
+    app.json = MsgspecJSONProvider(app)
 
     try:
         rc.ping()
@@ -26,6 +47,8 @@ def init_flask_app():
         print("Redis connection success!")
 
     app.config["SQLALCHEMY_DATABASE_URI"] = envs["DATABASE_URI"]
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(envs["DATABASE_URI"])
+    app.config["SQLALCHEMY_BINDS"] = replica_binds()
     app.config["SQLALCHEMY_TRACK_MODIFICATION"] = False
     app.config["SQLALCHEMY_ECHO"] = False
     app.config["SECRET_KEY"] = envs["SECRET_KEY"]
@@ -33,18 +56,43 @@ def init_flask_app():
     app.config["SESSION_REDIS"] = rc
     app.config["SESSION_PERMANENT"] = False
     app.config["SESSION_USE_SIGNER"] = True
+    app.config["SESSION_KEY_PREFIX"] = "session:"
+    app.config["SESSION_SERIALIZATION_FORMAT"] = "msgpack"
+    app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(seconds=envs["SESSION_TTL"])
+    app.config["MAX_CONTENT_LENGTH"] = envs["UPLOAD_MAX_BYTES"] + 64 * 1024
     
-    Session(app)
+    app.session_interface = LazyRedisSessionInterface(
+        app=app,
+        client=app.config["SESSION_REDIS"],
+        key_prefix=app.config["SESSION_KEY_PREFIX"],
+        use_signer=app.config["SESSION_USE_SIGNER"],
+        permanent=app.config["SESSION_PERMANENT"],
+        serialization_format=app.config["SESSION_SERIALIZATION_FORMAT"],
+        refresh_interval=envs["SESSION_REFRESH_INTERVAL"],
+        linked_keys=lambda session: (f"user:{session['uid']}", f"etag:user:{session['uid']}") if "uid" in session else ()
+    )
     db.init_app(app)
 
+    if envs["METRICS_ENABLED"]:
+        init_metrics(app)
+
     CORS(app, resources={r"/api/*": {
         "origins": cors["ALLOWED_ORIGIN"],
         "supports_credentials": cors["WITH_CREDENTIAL"]
     }})
 
     from src.views.user import user as user_blueprint
+    from src.views.media import media as media_blueprint
+    from src.views.metrics import metrics as metrics_blueprint
+    from src.utils.helpers import start_cache_listener
+    from src.utils.identifiers import load_identifier_filter
+
+    start_cache_listener()
 
     app.register_blueprint(user_blueprint)
+    app.register_blueprint(media_blueprint)
+    if envs["METRICS_ENABLED"]:
+        app.register_blueprint(metrics_blueprint)
 
     with app.app_context():
         from src.models.user import User
@@ -52,10 +100,12 @@ def init_flask_app():
         try:
             with app.app_context():
                 db.create_all()
+                upgrade_schema(db.engine, db.metadata)
         except SQLAlchemyError as e:
             print(f"Database connection error! \n{e}")
             sys.exit(1)
         else:
             db.session.execute(text("SELECT 1"))
             print("Database connection success!")
+            load_identifier_filter()
             return app
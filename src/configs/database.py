@@ -0,0 +1,131 @@
+from flask import has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.pool import QueuePool, NullPool, Pool
+from sqlalchemy import exc, event, Select
+from time import perf_counter, time
+from typing import Dict, Any
+import random
+
+from src.utils import envs
+
+
+class MeteredQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics: Dict[str, Any] = {
+            "checkouts": 0,
+            "checkins": 0,
+            "connects": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0
+        }
+
+    def _do_get(self):
+        waited = self._pool.empty() and -1 < self._max_overflow <= self._overflow
+        started = perf_counter()
+        try:
+            record = self._checkout_record()
+        except exc.TimeoutError:
+            self.metrics["timeouts"] += 1
+            raise
+        finally:
+            if waited:
+                self.metrics["waits"] += 1
+                self.metrics["wait_seconds"] += perf_counter() - started
+        self.metrics["checkouts"] += 1
+        return record
+
+    def _checkout_record(self):
+        return super()._do_get()
+
+    def _do_return_conn(self, record):
+        self.metrics["checkins"] += 1
+        super()._do_return_conn(record)
+
+    def _create_connection(self):
+        self.metrics["connects"] += 1
+        return super()._create_connection()
+
+
+# no separate green pool: under eventlet.monkey_patch() QueuePool already waits on a green Condition
+POOL_CLASSES = {"queue": MeteredQueuePool, "null": NullPool}
+
+
+def engine_options(database_uri: str) -> Dict[str, Any]:
+    if envs["DB_POOL_MODE"] not in POOL_CLASSES:
+        raise ValueError(f"Unknown DB_POOL_MODE '{envs['DB_POOL_MODE']}', expected one of: {', '.join(POOL_CLASSES)}")
+
+    options: Dict[str, Any] = {"pool_pre_ping": envs["DB_POOL_PRE_PING"]}
+
+    if database_uri.startswith("sqlite"):
+        return options
+
+    pool_class = POOL_CLASSES[envs["DB_POOL_MODE"]]
+    options.update(poolclass=pool_class, pool_recycle=envs["DB_POOL_RECYCLE"])
+
+    if pool_class is not NullPool:
+        options.update(pool_size=envs["DB_POOL_SIZE"], max_overflow=envs["DB_MAX_OVERFLOW"],
+                       pool_timeout=envs["DB_POOL_TIMEOUT"], pool_use_lifo=True)
+
+    return options
+
+
+def pool_snapshot(pool: Pool) -> Dict[str, Any]:
+    snapshot: Dict[str, Any] = {"pool": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        snapshot.update(size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(),
+                        overflow=pool.overflow())
+
+    snapshot.update(getattr(pool, "metrics", {}))
+    return snapshot
+
+
+# route read-only queries to replicas with read-your-writes stickiness
+
+REPLICA_PREFIX = "replica_"
+STICKY_SESSION_KEY = "_primary_until"
+
+
+def replica_binds() -> Dict[str, Any]:
+    return {f"{REPLICA_PREFIX}{index}": {"url": uri, **engine_options(uri)}
+            for index, uri in enumerate(envs["DATABASE_REPLICA_URIS"])}
+
+
+def is_primary_sticky() -> bool:
+    return has_request_context() and flask_session.get(STICKY_SESSION_KEY, 0) > time()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+
+        replicas = [engine for key, engine in self._db.engines.items() if key and key.startswith(REPLICA_PREFIX)]
+
+        if not replicas or (mapper is None and clause is None):
+            return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+        is_read = isinstance(clause, Select) and clause._for_update_arg is None and not self._flushing
+
+        if not is_read:
+            self.info["wrote"] = True
+        elif not self.info.get("wrote") and not is_primary_sticky():
+            return random.choice(replicas)
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def mark_primary_sticky(session):
+    if not (session.info.pop("wrote", False) and has_request_context() and envs["DATABASE_REPLICA_URIS"]):
+        return
+    # only logged-in users carry stickiness, so anonymous writes such as /register never create a session
+    if flask_session.get("uid"):
+        flask_session[STICKY_SESSION_KEY] = time() + envs["REPLICA_STICKY_SECONDS"]
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def clear_primary_sticky(session):
+    session.info.pop("wrote", None)
@@ -0,0 +1,31 @@
+from sqlalchemy import inspect, MetaData
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+
+# create_all only creates missing tables, so columns and indexes added to an existing model land here
+def upgrade_schema(engine: Engine, metadata: MetaData):
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable:
+                    print(f"Cannot add non-nullable column {table.name}.{column.name}, migrate it manually!")
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                print(f"Added column {table.name}.{column.name}")
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    connection.execute(CreateIndex(index))
+                    print(f"Created index {index.name}")
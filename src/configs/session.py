@@ -0,0 +1,113 @@
+from flask_session.redis import RedisSession, RedisSessionInterface
+from flask_session._utils import total_seconds
+from itsdangerous import BadSignature
+from typing import Callable, Optional
+from time import time
+
+REFRESHED_AT_KEY = "_refreshed_at"
+
+
+class LazyRedisSession(RedisSession):
+    def __init__(self, sid: str, loader: Optional[Callable] = None, permanent: Optional[bool] = None):
+        self._loader = None
+        super().__init__(sid=sid, permanent=permanent)
+        self._loader = loader
+        self.deleted = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loader is None
+
+    def _load(self):
+        loader, self._loader = self._loader, None
+        if loader is not None:
+            data = loader(self)
+            if data:
+                dict.update(self, data)
+
+
+def _loads_first(name: str):
+    method = getattr(RedisSession, name)
+
+    def wrapper(self, *args, **kwargs):
+        if self._loader is not None:
+            self._load()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ("__getitem__", "__setitem__", "__delitem__", "__contains__", "__iter__", "__len__", "__bool__",
+              "__eq__", "__repr__", "get", "setdefault", "pop", "popitem", "update", "clear", "keys", "values",
+              "items", "copy"):
+    setattr(LazyRedisSession, _name, _loads_first(_name))
+
+
+class LazyRedisSessionInterface(RedisSessionInterface):
+    session_class = LazyRedisSession
+
+    def __init__(self, *args, refresh_interval: int = 0, linked_keys: Optional[Callable] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refresh_interval = refresh_interval
+        self.linked_keys = linked_keys
+
+    def should_set_storage(self, app, session) -> bool:
+        return session.modified
+
+    def open_session(self, app, request) -> LazyRedisSession:
+        sid = request.cookies.get(app.config["SESSION_COOKIE_NAME"])
+
+        if sid and self.use_signer:
+            try:
+                sid = self._unsign(app, sid)
+            except BadSignature:
+                sid = None
+
+        if not sid:
+            return self.session_class(sid=self._generate_sid(self.sid_length), permanent=self.permanent)
+
+        return self.session_class(sid=sid, loader=self.__loader(self._get_store_id(sid)))
+
+    def __loader(self, store_id: str) -> Callable:
+        def load(session: LazyRedisSession) -> Optional[dict]:
+            saved_session_data = self._retrieve_session_data(store_id)
+            if saved_session_data is None:
+                session.sid = self._generate_sid(self.sid_length)
+                if self.permanent:
+                    dict.__setitem__(session, "_permanent", True)
+            return saved_session_data
+        return load
+
+    # deletes the session and its linked keys in one DEL and lets RedisError propagate, so logout never fails silently
+    def destroy_session(self, session: LazyRedisSession):
+        if not session.loaded:
+            session._load()
+        linked_keys = self.linked_keys(session) if self.linked_keys else ()
+        self.client.delete(self._get_store_id(session.sid), *linked_keys)
+        session.deleted = True
+
+    def save_session(self, app, session, response) -> None:
+        if not session.loaded:
+            return
+
+        if session.deleted:
+            response.delete_cookie(key=self.get_cookie_name(app), domain=self.get_cookie_domain(app),
+                                   path=self.get_cookie_path(app))
+            response.vary.add("Cookie")
+            return
+
+        if session and (session.modified or session.get(REFRESHED_AT_KEY, 0) + self.refresh_interval <= time()):
+            session[REFRESHED_AT_KEY] = int(time())
+
+        super().save_session(app, session, response)
+
+    def _upsert_session(self, session_lifetime, session, store_id: str) -> None:
+        storage_time_to_live = total_seconds(session_lifetime)
+        linked_keys = self.linked_keys(session) if self.linked_keys else ()
+
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(name=store_id, value=self.serializer.encode(session), ex=storage_time_to_live)
+            for linked_key in linked_keys:
+                pipe.expire(linked_key, storage_time_to_live)
+            pipe.execute()
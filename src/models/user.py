@@ -2,6 +2,10 @@ from datetime import datetime, timezone
 from uuid import uuid4
 
 from src.configs import db 
+from src.utils import envs
+
+
+UPDATABLE_COLUMNS = {"name", "username", "gender", "bio", "setup", "password", "image", "image_id"}
 
 
 class User(db.Model):
@@ -14,6 +18,7 @@ class User(db.Model):
     password = db.Column(db.String(150), nullable=False)
     gender = db.Column(db.Enum("Male", "Female", "Other", name="gender"), nullable=True)
     image = db.Column(db.String(150), nullable=True)
+    image_id = db.Column(db.String(100), nullable=True, index=True)
     bio = db.Column(db.String(50), nullable=True)
     setup = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -27,17 +32,67 @@ class User(db.Model):
     def __repr__(self):
         return f"<User id: {self.id}>"
 
+    @staticmethod
+    def find_by_identifier(key: str, value: str):
+        column = {"email": User.email, "username": User.username}[key]
+        statement = db.select(*User.__table__.columns).where(column == value).limit(1)
+        user = db.session.execute(statement).first()
+
+        # a lagging replica may not have a user who registered moments ago, so confirm misses on the primary
+        if user is None and envs["DATABASE_REPLICA_URIS"]:
+            user = db.session.execute(statement, bind_arguments={"bind": db.engine}).first()
+        return user
+
     @staticmethod
     def update_user(id: str, data: dict):
-        user = User.query.get(id)
+        values = {key: value for key, value in data.items() if key in UPDATABLE_COLUMNS}
+        table = User.__table__
+        select_user = db.select(*table.columns).where(table.c.id == id)
+
+        if not values:
+            return db.session.execute(select_user).first()
 
-        if not user:
-            return None
+        statement = table.update().where(table.c.id == id).values(**values)
 
-        for key, value in data.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
+        # PostgreSQL and SQLite support UPDATE ... RETURNING; MySQL and MariaDB take the UPDATE + SELECT path
+        if db.session.get_bind().dialect.update_returning:
+            user = db.session.execute(statement.returning(*table.columns)).first()
+        else:
+            result = db.session.execute(statement)
+            user = db.session.execute(select_user).first() if result.rowcount else None
 
         db.session.commit()
         return user
+
+    @staticmethod
+    def replace_image(id: str, image: str, image_id: str):
+        table = User.__table__
+        previous = db.session.execute(db.select(table.c.image, table.c.image_id)
+                                      .where(table.c.id == id).with_for_update()).first()
+
+        if previous is None:
+            db.session.rollback()
+            return None, None
+
+        return User.update_user(id=id, data={"image": image, "image_id": image_id}), previous
+
+    @staticmethod
+    def count_users() -> int:
+        return db.session.execute(db.select(db.func.count()).select_from(User.__table__),
+                                  bind_arguments={"bind": db.engine}).scalar_one()
+
+    @staticmethod
+    def iter_identifiers(batch_size: int = 1000):
+        statement = db.select(User.email, User.username).execution_options(yield_per=batch_size)
+        for email, username in db.session.execute(statement, bind_arguments={"bind": db.engine}):
+            yield email
+            if username:
+                yield username
+
+    @staticmethod
+    def image_in_use(image_id: str, exclude_id: str | None = None) -> bool:
+        query = db.session.query(User.id).filter(User.image_id == image_id)
+        if exclude_id:
+            query = query.filter(User.id != exclude_id)
+        return query.first() is not None
     
\ No newline at end of file
@@ -1,6 +1,6 @@
 from typing import Dict, Any
 from dotenv import load_dotenv
-from os import getenv
+from os import getenv, cpu_count
 
 
 class EnvConfig:
@@ -15,7 +15,61 @@ class EnvConfig:
             "SECRET_KEY": getenv("SECRET_KEY"),
             "CORS_ORIGIN": getenv("CORS_ORIGIN", "*"),
             "SERVER_MODE": getenv("SERVER_MODE", "development"),
-            "PORT": int(getenv("PORT", "4000"))
+            "PORT": int(getenv("PORT", "4000")),
+            "HASH_POOL_MODE": getenv("HASH_POOL_MODE", "tpool"),
+            "HASH_POOL_SIZE": int(getenv("HASH_POOL_SIZE", str(cpu_count() or 1))),
+            "HASH_QUEUE_LIMIT": int(getenv("HASH_QUEUE_LIMIT", "64")),
+            "BCRYPT_ROUNDS": int(getenv("BCRYPT_ROUNDS", "12")),
+            "BCRYPT_TARGET_MS": int(getenv("BCRYPT_TARGET_MS", "0")),
+            "LOCAL_CACHE_SIZE": int(getenv("LOCAL_CACHE_SIZE", "1024")),
+            "LOCAL_CACHE_TTL": int(getenv("LOCAL_CACHE_TTL", "30")),
+            "CACHE_LOCK_TTL_MS": int(getenv("CACHE_LOCK_TTL_MS", "2000")),
+            "CACHE_LOCK_WAIT_MS": int(getenv("CACHE_LOCK_WAIT_MS", "500")),
+            "CACHE_EARLY_REFRESH_BETA": float(getenv("CACHE_EARLY_REFRESH_BETA", "1.0")),
+            "PRESENCE_TTL": int(getenv("PRESENCE_TTL", "60")),
+            "PRESENCE_HEARTBEAT": int(getenv("PRESENCE_HEARTBEAT", "20")),
+            "SOCKETIO_MULTI_NODE": getenv("SOCKETIO_MULTI_NODE", "false").lower() == "true",
+            "SOCKETIO_CHANNEL": getenv("SOCKETIO_CHANNEL", "flask-socketio"),
+            "UPLOAD_SPOOL_DIR": getenv("UPLOAD_SPOOL_DIR") or None,
+            "UPLOAD_WORKERS": int(getenv("UPLOAD_WORKERS", "4")),
+            "UPLOAD_QUEUE_LIMIT": int(getenv("UPLOAD_QUEUE_LIMIT", "100")),
+            "UPLOAD_MAX_BYTES": int(getenv("UPLOAD_MAX_BYTES", str(5 * 1024 * 1024))),
+            "UPLOAD_MAX_PIXELS": int(getenv("UPLOAD_MAX_PIXELS", str(40 * 1000 * 1000))),
+            "AVATAR_SIZE": int(getenv("AVATAR_SIZE", "512")),
+            "AVATAR_FORMAT": getenv("AVATAR_FORMAT", "WEBP").upper(),
+            "AVATAR_QUALITY": int(getenv("AVATAR_QUALITY", "80")),
+            "STORAGE_BACKEND": getenv("STORAGE_BACKEND", "cloudinary"),
+            "LOCAL_STORAGE_DIR": getenv("LOCAL_STORAGE_DIR", "media/avatars"),
+            "LOCAL_STORAGE_URL": getenv("LOCAL_STORAGE_URL", "/media/avatars"),
+            "DB_POOL_MODE": getenv("DB_POOL_MODE", "queue"),
+            "DB_POOL_SIZE": int(getenv("DB_POOL_SIZE", "5")),
+            "DB_MAX_OVERFLOW": int(getenv("DB_MAX_OVERFLOW", "10")),
+            "DB_POOL_TIMEOUT": int(getenv("DB_POOL_TIMEOUT", "30")),
+            "DB_POOL_RECYCLE": int(getenv("DB_POOL_RECYCLE", "1800")),
+            "DB_POOL_PRE_PING": getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+            "DATABASE_REPLICA_URIS": [uri.strip() for uri in getenv("DATABASE_REPLICA_URIS", "").split(",") if uri.strip()],
+            "REPLICA_STICKY_SECONDS": int(getenv("REPLICA_STICKY_SECONDS", "10")),
+            "REDIS_MAX_CONNECTIONS": int(getenv("REDIS_MAX_CONNECTIONS", "50")),
+            "REDIS_SOCKET_TIMEOUT": float(getenv("REDIS_SOCKET_TIMEOUT", "2")),
+            "REDIS_CONNECT_TIMEOUT": float(getenv("REDIS_CONNECT_TIMEOUT", "2")),
+            "REDIS_HEALTH_CHECK_INTERVAL": int(getenv("REDIS_HEALTH_CHECK_INTERVAL", "30")),
+            "REDIS_RETRIES": int(getenv("REDIS_RETRIES", "3")),
+            "REDIS_BACKOFF_BASE": float(getenv("REDIS_BACKOFF_BASE", "0.05")),
+            "REDIS_BACKOFF_CAP": float(getenv("REDIS_BACKOFF_CAP", "1")),
+            "REDIS_BREAKER_THRESHOLD": int(getenv("REDIS_BREAKER_THRESHOLD", "5")),
+            "REDIS_BREAKER_RESET": int(getenv("REDIS_BREAKER_RESET", "10")),
+            "SESSION_TTL": int(getenv("SESSION_TTL", "3600")),
+            "SESSION_REFRESH_INTERVAL": int(getenv("SESSION_REFRESH_INTERVAL", "300")),
+            "METRICS_ENABLED": getenv("METRICS_ENABLED", "false").lower() == "true",
+            "METRICS_TOKEN": getenv("METRICS_TOKEN", ""),
+            "RATE_LIMIT_ENABLED": getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
+            "RATE_LIMITS": getenv("RATE_LIMITS", "login=10/60,register=5/600,change-password=5/300"),
+            "RATE_LIMIT_LOCAL_SIZE": int(getenv("RATE_LIMIT_LOCAL_SIZE", "10000")),
+            "RATE_LIMIT_TRUST_PROXY": getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true",
+            "IDENTIFIER_FILTER_ENABLED": getenv("IDENTIFIER_FILTER_ENABLED", "true").lower() == "true",
+            "IDENTIFIER_FILTER_CAPACITY": int(getenv("IDENTIFIER_FILTER_CAPACITY", "100000")),
+            "IDENTIFIER_FILTER_ERROR_RATE": float(getenv("IDENTIFIER_FILTER_ERROR_RATE", "0.001")),
+            "IDENTIFIER_FILTER_REBUILD": int(getenv("IDENTIFIER_FILTER_REBUILD", "600"))
         }
 
         missing = [key for key in required_keys if not self.__variables[key]]
@@ -23,6 +77,10 @@ class EnvConfig:
         if missing:
             raise EnvironmentError(f"Missing required environment variables: {', '.join(missing)}")
 
+        if (self.__variables["METRICS_ENABLED"] and self.__variables["SERVER_MODE"] == "production"
+                and not self.__variables["METRICS_TOKEN"]):
+            raise EnvironmentError("METRICS_TOKEN is required when METRICS_ENABLED is true in production mode")
+
     def __contains__(self, key: str) -> bool:
         return key in self.__variables
     
@@ -0,0 +1,27 @@
+from hashlib import blake2b
+from typing import Iterator
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self.__bits = bytearray((self.size + 7) // 8)
+
+    def __indexes(self, value: str) -> Iterator[int]:
+        digest = blake2b(value.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+    def add(self, value: str):
+        for index in self.__indexes(value):
+            self.__bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.__bits[index >> 3] & (1 << (index & 7)) for index in self.__indexes(value))
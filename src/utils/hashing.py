@@ -0,0 +1,135 @@
+from bcrypt import hashpw, gensalt, checkpw
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, Any
+from eventlet.semaphore import Semaphore
+from eventlet import tpool
+
+from src.utils import envs
+
+
+class HashQueueFull(Exception):
+    pass
+
+
+def _hash_password(plain_text: bytes, rounds: int) -> bytes:
+    return hashpw(plain_text, gensalt(rounds=rounds))
+
+
+def _check_password(plain_text: bytes, hashed_text: bytes) -> bool:
+    return checkpw(plain_text, hashed_text)
+
+
+# no process pool: its result pipes and management thread deadlock once eventlet.monkey_patch() has run
+HASHING_MODES = ("tpool", "inline")
+
+
+class HashingService:
+    def __init__(self, mode: str, pool_size: int, queue_limit: int, rounds: int, target_ms: int = 0):
+        if mode not in HASHING_MODES:
+            raise ValueError(f"Unknown HASH_POOL_MODE '{mode}', expected one of: {', '.join(HASHING_MODES)}")
+
+        self.mode = mode
+        self.queue_limit = queue_limit
+        self.target_ms = target_ms
+        self.__rounds = rounds
+        self.__calibrated = target_ms <= 0
+
+        if mode == "tpool":
+            tpool.set_num_threads(pool_size)
+
+        self.__lock = Lock()
+        self.__calibration_lock = Semaphore()
+        self.__pending = 0
+        self.__metrics: Dict[str, Any] = {
+            "calls": 0,
+            "rejected": 0,
+            "errors": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "last_seconds": 0.0
+        }
+
+    @property
+    def rounds(self) -> int:
+        if not self.__calibrated:
+            with self.__calibration_lock:
+                if not self.__calibrated:
+                    self.__rounds = self.__run(self.calibrate, self.target_ms)
+                    self.__calibrated = True
+        return self.__rounds
+
+    def __acquire(self):
+        with self.__lock:
+            if self.__pending >= self.queue_limit:
+                self.__metrics["rejected"] += 1
+                raise HashQueueFull("Too many pending password hashing requests!")
+            self.__pending += 1
+
+    def __release(self, elapsed: float, failed: bool):
+        with self.__lock:
+            self.__pending -= 1
+            self.__metrics["calls"] += 1
+            self.__metrics["total_seconds"] += elapsed
+            self.__metrics["last_seconds"] = elapsed
+            self.__metrics["max_seconds"] = max(self.__metrics["max_seconds"], elapsed)
+            if failed:
+                self.__metrics["errors"] += 1
+
+    def __run(self, func: Callable, *args):
+        if self.mode == "tpool":
+            return tpool.execute(func, *args)
+        return func(*args)
+
+    def execute(self, func: Callable, *args):
+        self.__acquire()
+        started = perf_counter()
+        failed = True
+        try:
+            result = self.__run(func, *args)
+            failed = False
+            return result
+        finally:
+            self.__release(perf_counter() - started, failed)
+
+    @staticmethod
+    def calibrate(target_ms: int, min_rounds: int = 4, max_rounds: int = 16) -> int:
+        for rounds in range(min_rounds, max_rounds + 1):
+            started = perf_counter()
+            _hash_password(b"calibration", rounds)
+            if (perf_counter() - started) * 1000 >= target_ms:
+                return rounds
+        return max_rounds
+
+    def metrics(self) -> Dict[str, Any]:
+        with self.__lock:
+            snapshot = dict(self.__metrics)
+            snapshot["pending"] = self.__pending
+        calls = snapshot["calls"]
+        snapshot["rounds"] = self.__rounds
+        snapshot["avg_seconds"] = snapshot["total_seconds"] / calls if calls else 0.0
+        return snapshot
+
+
+hashing = HashingService(mode=envs["HASH_POOL_MODE"], pool_size=envs["HASH_POOL_SIZE"],
+                         queue_limit=envs["HASH_QUEUE_LIMIT"], rounds=envs["BCRYPT_ROUNDS"],
+                         target_ms=envs["BCRYPT_TARGET_MS"])
+
+
+def generate_hash(plain_text: str) -> str:
+    return hashing.execute(_hash_password, plain_text.encode("utf-8"), hashing.rounds).decode()
+
+
+def verify_hash(plain_text: str, hashed_text: str) -> bool:
+    return hashing.execute(_check_password, plain_text.encode("utf-8"), hashed_text.encode("utf-8"))
+
+
+def hash_rounds(hashed_text: str) -> int | None:
+    try:
+        return int(hashed_text.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed_text: str) -> bool:
+    return hash_rounds(hashed_text) != hashing.rounds
@@ -1,9 +1,49 @@
-from flask import session, g
+from flask import session, g, current_app
 from redis import RedisError
-from typing import Any, Optional
-import json
+from typing import Any, Callable, Optional, Dict, Iterable, Tuple
+from collections import OrderedDict
+from hashlib import blake2b
+from contextlib import contextmanager
+from eventlet.semaphore import Semaphore
+from threading import Lock
+from time import monotonic, perf_counter, sleep, time
+from uuid import uuid4
+import eventlet
+import msgspec
+import random
+import math
 
 from src.configs import rc
+from src.utils import envs
+from src.utils.schema import UserProfile
+
+
+NODE_ID = uuid4().hex
+CACHE_CHANNEL = "cache:invalidate"
+
+cache_encoder = msgspec.msgpack.Encoder()
+etag_encoder = msgspec.msgpack.Encoder(order="sorted")
+cache_decoders = {"user": msgspec.msgpack.Decoder(UserProfile)}
+default_decoder = msgspec.msgpack.Decoder()
+
+
+def encode_cache(data: Any) -> bytes:
+    return cache_encoder.encode(data)
+
+
+def decode_cache(type: str, value: bytes) -> Any:
+    data = cache_decoders.get(type, default_decoder).decode(value)
+    if isinstance(data, msgspec.Struct):
+        return msgspec.structs.asdict(data)
+    return data
+
+
+def content_etag(data: Any) -> str:
+    return blake2b(etag_encoder.encode(data), digest_size=12).hexdigest()
+
+
+def etag_key(store_key: str) -> str:
+    return f"etag:{store_key}"
 
 
 def has_empty_field(fields: dict) -> bool:
@@ -20,36 +60,434 @@ def clear_session_cookies() -> object:
     session_key = next((key for key in ["username", "email"] if key in session), None)
     session_user = session.pop(session_key, None)
     session_uid = session.pop("uid", None)
-    session.clear()
+    if session:
+        session.clear()
     return {"user": session_user, "uid": session_uid}
 
 
-def store_to_redis(type: str, key: str, data: Any) -> bool:
+class LocalCache:
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__lock = Lock()
+        self.__data: OrderedDict[str, tuple] = OrderedDict()
+        self.__stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.__lock:
+            entry = self.__data.get(key)
+            if entry is None:
+                self.__stats["misses"] += 1
+                return None
+            if entry[0] < monotonic():
+                del self.__data[key]
+                self.__stats["misses"] += 1
+                return None
+            self.__data.move_to_end(key)
+            self.__stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self.__lock:
+            self.__data[key] = (monotonic() + self.ttl, value)
+            self.__data.move_to_end(key)
+            while len(self.__data) > self.maxsize:
+                self.__data.popitem(last=False)
+                self.__stats["evictions"] += 1
+
+    def delete(self, key: str):
+        with self.__lock:
+            if self.__data.pop(key, None) is not None:
+                self.__stats["invalidations"] += 1
+
+    def clear(self):
+        with self.__lock:
+            self.__stats["invalidations"] += len(self.__data)
+            self.__data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {**self.__stats, "size": len(self.__data)}
+
+
+local_cache = LocalCache(maxsize=envs["LOCAL_CACHE_SIZE"], ttl=envs["LOCAL_CACHE_TTL"])
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: int):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.__lock = Lock()
+        self.__failures = 0
+        self.__opened_at: Optional[float] = None
+        self.__trial = False
+
+    @property
+    def state(self) -> str:
+        if self.__opened_at is None:
+            return "closed"
+        return "half-open" if monotonic() - self.__opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self.__lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.__trial:
+                self.__trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.__lock:
+            self.__failures = 0
+            self.__opened_at = None
+            self.__trial = False
+
+    def record_failure(self):
+        with self.__lock:
+            self.__failures += 1
+            self.__trial = False
+            if self.__opened_at is not None or self.__failures >= self.failure_threshold:
+                self.__opened_at = monotonic()
+
+
+redis_breaker = CircuitBreaker(failure_threshold=envs["REDIS_BREAKER_THRESHOLD"],
+                               reset_timeout=envs["REDIS_BREAKER_RESET"])
+
+
+def publish_invalidation(store_key: str):
+    if not redis_breaker.allow():
+        return
+    try:
+        rc.publish(CACHE_CHANNEL, f"{NODE_ID} {store_key}")
+        redis_breaker.record_success()
+    except RedisError as e:
+        redis_breaker.record_failure()
+        print(f"Failed to publish cache invalidation: {e}")
+
+
+def store_to_redis(type: str, key: str, data: Any, invalidate: bool = False) -> bool:
     store_key = f"{type}:{key}"
+    if not redis_breaker.allow():
+        local_cache.delete(store_key)
+        local_cache.delete(etag_key(store_key))
+        return False
     try:
-        store_data = json.dumps(data)
-        return rc.set(store_key, store_data, 3600)
-    except (RedisError, TypeError, ValueError) as e:
+        store_data = encode_cache(data)
+        etag = content_etag(data)
+        with rc.pipeline(transaction=False) as pipe:
+            pipe.set(store_key, store_data, envs["SESSION_TTL"])
+            pipe.set(etag_key(store_key), etag, envs["SESSION_TTL"])
+            stored, _ = pipe.execute()
+        redis_breaker.record_success()
+    except (TypeError, msgspec.EncodeError) as e:
+        print(f"Failed to encode data for Redis: {e}")
+        return False
+    except RedisError as e:
+        redis_breaker.record_failure()
         print(f"Failed to store data in Redis: {e}")
+        local_cache.delete(store_key)
+        local_cache.delete(etag_key(store_key))
         return False
+    local_cache.set(store_key, data)
+    local_cache.set(etag_key(store_key), etag)
+    if invalidate:
+        publish_invalidation(store_key)
+    return stored
+
+
+def retrieve_etag(type: str, key: str) -> Optional[str]:
+    store_key = etag_key(f"{type}:{key}")
+    etag = local_cache.get(store_key)
+    if etag is not None:
+        return etag
+    if not redis_breaker.allow():
+        return None
+    try:
+        etag = rc.get(store_key)
+        redis_breaker.record_success()
+    except RedisError as e:
+        redis_breaker.record_failure()
+        print(f"Failed to retrieve etag from Redis: {e}")
+        return None
+    if etag is None:
+        return None
+    etag = etag.decode()
+    local_cache.set(store_key, etag)
+    return etag
 
 
 def retrieve_from_redis(type: str, key: str) -> Optional[Any]:
     store_key = f"{type}:{key}"
+    cache_value = local_cache.get(store_key)
+    if cache_value is not None:
+        return cache_value
+    if not redis_breaker.allow():
+        return None
     try:
         store_value = rc.get(store_key)
+        redis_breaker.record_success()
         if store_value:
-            return json.loads(store_value.decode("utf-8"))
-    except (RedisError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            data = decode_cache(type, store_value)
+            local_cache.set(store_key, data)
+            return data
+    except RedisError as e:
+        redis_breaker.record_failure()
         print(f"Failed to retrieve data from Redis: {e}")
+    except msgspec.DecodeError as e:
+        print(f"Failed to decode data from Redis: {e}")
     return None
 
 
+def evict_from_cache(type: str, key: str):
+    store_key = f"{type}:{key}"
+    local_cache.delete(store_key)
+    local_cache.delete(etag_key(store_key))
+    publish_invalidation(store_key)
+
+
+# single-flight cache fills with probabilistic early refresh
+
+release_lock_script = rc.register_script("""
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+""")
+
+
+class KeyedLocks:
+    def __init__(self):
+        self.__locks: Dict[str, list] = {}
+
+    @contextmanager
+    def hold(self, key: str):
+        entry = self.__locks.setdefault(key, [Semaphore(), 0])
+        entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self.__locks.pop(key, None)
+
+
+fill_locks = KeyedLocks()
+fill_stats: Dict[str, int] = {"fills": 0, "coalesced": 0, "early_refreshes": 0, "lock_waits": 0}
+_recompute_seconds: Dict[str, float] = {}
+
+
+def _peek_redis(type: str, key: str) -> Tuple[Optional[Any], int]:
+    store_key = f"{type}:{key}"
+    try:
+        with rc.pipeline(transaction=False) as pipe:
+            pipe.get(store_key)
+            pipe.pttl(store_key)
+            store_value, ttl_ms = pipe.execute()
+        redis_breaker.record_success()
+    except RedisError as e:
+        redis_breaker.record_failure()
+        print(f"Failed to retrieve data from Redis: {e}")
+        return None, -2
+    if not store_value:
+        return None, -2
+    try:
+        data = decode_cache(type, store_value)
+    except msgspec.DecodeError as e:
+        print(f"Failed to decode data from Redis: {e}")
+        return None, -2
+    local_cache.set(store_key, data)
+    return data, ttl_ms
+
+
+def _should_refresh_early(type: str, ttl_ms: int) -> bool:
+    delta = _recompute_seconds.get(type)
+    if not delta or ttl_ms < 0:
+        return False
+    return -delta * envs["CACHE_EARLY_REFRESH_BETA"] * math.log(1.0 - random.random()) * 1000 >= ttl_ms
+
+
+def _acquire_fill_lock(lock_key: str, token: str) -> bool:
+    if not redis_breaker.allow():
+        return False
+    try:
+        locked = rc.set(lock_key, token, nx=True, px=envs["CACHE_LOCK_TTL_MS"])
+        redis_breaker.record_success()
+        return bool(locked)
+    except RedisError as e:
+        redis_breaker.record_failure()
+        print(f"Failed to acquire cache fill lock: {e}")
+        return False
+
+
+def _fill_cache(type: str, key: str, loader: Callable[[], Any], wait: bool) -> Tuple[bool, Any]:
+    store_key = f"{type}:{key}"
+    lock_key = f"lock:{store_key}"
+    token = uuid4().hex
+    locked = _acquire_fill_lock(lock_key, token)
+
+    if not locked and not wait:
+        return False, None
+
+    if not locked and redis_breaker.allow():
+        fill_stats["lock_waits"] += 1
+        deadline = monotonic() + envs["CACHE_LOCK_WAIT_MS"] / 1000
+        while monotonic() < deadline:
+            eventlet.sleep(0.05)
+            data, _ = _peek_redis(type, key)
+            if data is not None:
+                return True, data
+
+    try:
+        started = perf_counter()
+        data = loader()
+        elapsed = perf_counter() - started
+        _recompute_seconds[type] = 0.8 * _recompute_seconds.get(type, elapsed) + 0.2 * elapsed
+        fill_stats["fills"] += 1
+        if data is not None:
+            store_to_redis(type, key, data)
+        return True, data
+    finally:
+        if locked:
+            try:
+                release_lock_script(keys=[lock_key], args=[token])
+            except RedisError as e:
+                print(f"Failed to release cache fill lock: {e}")
+
+
+def load_through_cache(type: str, key: str, loader: Callable[[], Any]) -> Optional[Any]:
+    store_key = f"{type}:{key}"
+    data = local_cache.get(store_key)
+    if data is not None:
+        return data
+    if not redis_breaker.allow():
+        return loader()
+
+    with fill_locks.hold(store_key):
+        data = local_cache.get(store_key)
+        if data is not None:
+            fill_stats["coalesced"] += 1
+            return data
+
+        data, ttl_ms = _peek_redis(type, key)
+        if data is None:
+            return _fill_cache(type, key, loader, wait=True)[1]
+
+        if _should_refresh_early(type, ttl_ms):
+            refreshed, fresh_data = _fill_cache(type, key, loader, wait=False)
+            if refreshed:
+                fill_stats["early_refreshes"] += 1
+                return fresh_data
+        return data
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {**local_cache.stats(), **fill_stats, "breaker": redis_breaker.state}
+
+
+def _handle_invalidation(message: dict):
+    node_id, _, store_key = message["data"].decode().partition(" ")
+    if node_id != NODE_ID:
+        local_cache.delete(store_key)
+        local_cache.delete(etag_key(store_key))
+
+
+def _handle_listener_error(error: BaseException, pubsub, thread):
+    print(f"Cache invalidation listener error: {error}")
+    local_cache.clear()
+    for hook in _listener_error_hooks:
+        hook()
+    sleep(1)
+
+
+_listener = None
+_listener_channels: Dict[str, Callable] = {}
+_listener_error_hooks: list = []
+
+
+def subscribe_channel(channel: str, handler: Callable, on_error: Optional[Callable] = None):
+    _listener_channels[channel] = handler
+    if on_error is not None:
+        _listener_error_hooks.append(on_error)
+
+
+def start_cache_listener():
+    global _listener
+    if _listener is not None:
+        return _listener
+    channels = dict(_listener_channels)
+    if local_cache.maxsize > 0:
+        channels[CACHE_CHANNEL] = _handle_invalidation
+    if not channels:
+        return None
+    pubsub = rc.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**channels)
+    _listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=_handle_listener_error)
+    return _listener
+
+
 # helper function for socket connections
 
+ONLINE_USERS_KEY = "online:users"
+NODES_KEY = "nodes"
+
+
+def node_sockets_key(node_id: str = NODE_ID) -> str:
+    return f"node:{node_id}:sids"
+
+
+def node_alive_key(node_id: str = NODE_ID) -> str:
+    return f"node:{node_id}:alive"
+
+
+remove_socket_script = rc.register_script("""
+local user_id = redis.call("GET", KEYS[1]) or redis.call("HGET", KEYS[2], ARGV[1])
+redis.call("HDEL", KEYS[2], ARGV[1])
+if not user_id then
+    return false
+end
+local user_key = "sockets:" .. user_id
+redis.call("SREM", user_key, ARGV[1])
+redis.call("DEL", KEYS[1])
+if redis.call("SCARD", user_key) == 0 then
+    redis.call("DEL", user_key)
+    redis.call("ZREM", KEYS[3], user_id)
+end
+return user_id
+""")
+
+refresh_node_script = rc.register_script("""
+redis.call("SET", KEYS[1], "1", "EX", ARGV[1])
+redis.call("SADD", KEYS[2], ARGV[2])
+local socket_ids = redis.call("HKEYS", KEYS[3])
+for _, socket_id in ipairs(socket_ids) do
+    redis.call("EXPIRE", "sid:" .. socket_id, ARGV[1])
+end
+return #socket_ids
+""")
+
+
 def add_user_sockets(user_id: str, socket_id: str):
-    rc.sadd(f"sockets:{user_id}", socket_id)
-    rc.set(f"sid:{socket_id}", user_id)
+    add_users_sockets([(user_id, socket_id)])
+
+
+def add_users_sockets(connections: Iterable[Tuple[str, str]]):
+    now = time()
+    with rc.pipeline(transaction=True) as pipe:
+        for user_id, socket_id in connections:
+            pipe.sadd(f"sockets:{user_id}", socket_id)
+            pipe.set(f"sid:{socket_id}", user_id, envs["PRESENCE_TTL"])
+            pipe.hset(node_sockets_key(), socket_id, user_id)
+            pipe.zadd(ONLINE_USERS_KEY, {user_id: now})
+        pipe.execute()
+
+
+def touch_user(user_id: str):
+    rc.zadd(ONLINE_USERS_KEY, {user_id: time()}, xx=True)
 
 
 def get_user_sockets(user_id: str):
@@ -57,58 +495,102 @@ def get_user_sockets(user_id: str):
     return [sid.decode() for sid in socket_ids]
 
 
-def get_connected_users():
-    user_ids = []
+def emit_to_user(user_id: str, event: str, data: Any = None, namespace: str = "/") -> int:
+    socket_ids = get_user_sockets(user_id)
+    if socket_ids:
+        current_app.extensions["socketio"].emit(event, data, to=socket_ids, namespace=namespace)
+    return len(socket_ids)
 
-    for key in rc.scan_iter("sockets:*"):
-        key = key.decode()
-        if key.startswith("sockets:"):
-            user_id = key[len("sockets:"):]
-            if rc.scard(key) > 0:
-                user_ids.append(user_id)
 
-    return user_ids
+def get_node_sockets(node_id: str = NODE_ID):
+    socket_ids = rc.hkeys(node_sockets_key(node_id))
+    return [sid.decode() for sid in socket_ids]
+
+
+def scan_connected_users(cursor: int = 0, count: int = 100) -> Tuple[int, list]:
+    cursor, members = rc.zscan(ONLINE_USERS_KEY, cursor=cursor, count=count)
+    return cursor, [user_id.decode() for user_id, _ in members]
+
+
+def count_connected_users() -> int:
+    return rc.zcard(ONLINE_USERS_KEY)
+
+
+def get_connected_users():
+    return [user_id.decode() for user_id in rc.zrange(ONLINE_USERS_KEY, 0, -1)]
 
 
 def get_connected_sockets():
     all_socket_ids = []
 
-    for key in rc.scan_iter("sockets:*"):
-        socket_ids = rc.smembers(key)
-        decoded_sockets = [sid.decode() for sid in socket_ids]
-        all_socket_ids.extend(decoded_sockets)
+    for socket_ids in get_connections_details().values():
+        all_socket_ids.extend(socket_ids)
 
     return all_socket_ids
 
 
+def scan_connections_details(cursor: int = 0, count: int = 100) -> Tuple[int, Dict[str, list]]:
+    cursor, user_ids = scan_connected_users(cursor, count)
+
+    with rc.pipeline(transaction=False) as pipe:
+        for user_id in user_ids:
+            pipe.smembers(f"sockets:{user_id}")
+        members = pipe.execute()
+
+    return cursor, {user_id: [sid.decode() for sid in socket_ids]
+                    for user_id, socket_ids in zip(user_ids, members) if socket_ids}
+
+
 def get_connections_details():
     user_socket_map = {}
+    cursor = 0
 
-    for raw_key in rc.scan_iter("sockets:*"):
-        key = raw_key.decode() 
-        user_id = key[len("sockets:"):]
-        socket_ids = rc.smembers(raw_key)
-        decoded_sockets = [sid.decode() for sid in socket_ids]
-        user_socket_map[user_id] = decoded_sockets
-
-    return user_socket_map
+    while True:
+        cursor, details = scan_connections_details(cursor)
+        user_socket_map.update(details)
+        if cursor == 0:
+            return user_socket_map
 
 
 def remove_socket_by_sid(socket_id: str):
-    user_id = rc.get(f"sid:{socket_id}")
-    if not user_id:
-        return None
+    return remove_sockets_by_sids([socket_id])[0]
+
+
+def remove_sockets_by_sids(socket_ids: Iterable[str], node_id: str = NODE_ID):
+    node_key = node_sockets_key(node_id)
+
+    with rc.pipeline(transaction=False) as pipe:
+        for socket_id in socket_ids:
+            remove_socket_script(keys=[f"sid:{socket_id}", node_key, ONLINE_USERS_KEY], args=[socket_id], client=pipe)
+        user_ids = pipe.execute()
+
+    return [user_id.decode() if isinstance(user_id, bytes) else user_id for user_id in user_ids]
+
 
-    if isinstance(user_id, bytes):
-        user_id = user_id.decode()
+def refresh_node_presence() -> int:
+    return refresh_node_script(keys=[node_alive_key(), NODES_KEY, node_sockets_key()],
+                               args=[envs["PRESENCE_TTL"], NODE_ID])
 
-    user_key = f"sockets:{user_id}"
 
-    rc.srem(user_key, socket_id)
+def reap_dead_nodes() -> Dict[str, int]:
+    node_ids = [node_id.decode() for node_id in rc.smembers(NODES_KEY)]
 
-    rc.delete(f"sid:{socket_id}")
+    with rc.pipeline(transaction=False) as pipe:
+        for node_id in node_ids:
+            pipe.exists(node_alive_key(node_id))
+        alive = pipe.execute()
 
-    if rc.scard(user_key) == 0:
-        rc.delete(user_key)
+    reaped = {}
+    for node_id, is_alive in zip(node_ids, alive):
+        if is_alive or node_id == NODE_ID:
+            continue
+        socket_ids = get_node_sockets(node_id)
+        if socket_ids:
+            remove_sockets_by_sids(socket_ids, node_id=node_id)
+        with rc.pipeline(transaction=True) as pipe:
+            pipe.delete(node_sockets_key(node_id))
+            pipe.srem(NODES_KEY, node_id)
+            pipe.execute()
+        reaped[node_id] = len(socket_ids)
 
-    return user_id
+    return reaped
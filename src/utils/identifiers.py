@@ -0,0 +1,146 @@
+from sqlalchemy.exc import SQLAlchemyError
+from redis import RedisError
+from threading import Lock
+from time import monotonic
+from typing import Iterable, Optional
+import eventlet
+
+from src.configs import rc
+from src.utils import envs
+from src.models.user import User
+from src.utils.bloom import BloomFilter
+from src.utils.hashing import hashing, generate_hash
+from src.utils.helpers import NODE_ID, redis_breaker, subscribe_channel
+from src.utils.metrics import Counter, registry
+
+
+IDENTIFIER_CHANNEL = "identifiers:add"
+
+identifier_lookups = Counter("identifier_filter_lookups_total", "Login identifier lookups by filter outcome.",
+                             ("result",))
+registry.append(identifier_lookups)
+
+
+class IdentifierFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.stale = True
+        self.built_at = 0.0
+        self.__lock = Lock()
+        self.__bloom: Optional[BloomFilter] = None
+        self.__pending: Optional[list] = None
+
+    def may_exist(self, value: str) -> bool:
+        bloom = self.__bloom
+        return bloom is None or self.stale or value.lower() in bloom
+
+    def add(self, *values: str):
+        with self.__lock:
+            for value in values:
+                if not value:
+                    continue
+                if self.__bloom is not None:
+                    self.__bloom.add(value.lower())
+                if self.__pending is not None:
+                    self.__pending.append(value.lower())
+
+    def rebuild(self, identifiers: Iterable[str], expected: int):
+        with self.__lock:
+            self.__pending = []
+
+        bloom = BloomFilter(max(self.capacity, expected * 2), self.error_rate)
+        try:
+            for value in identifiers:
+                bloom.add(value.lower())
+        except BaseException:
+            with self.__lock:
+                self.__pending = None
+            raise
+
+        with self.__lock:
+            for value in self.__pending:
+                bloom.add(value)
+            self.__bloom, self.__pending = bloom, None
+            self.stale = False
+            self.built_at = monotonic()
+
+    def mark_stale(self):
+        self.stale = True
+
+    def needs_rebuild(self, interval: int) -> bool:
+        return self.stale or monotonic() - self.built_at >= interval
+
+
+identifier_filter = IdentifierFilter(capacity=envs["IDENTIFIER_FILTER_CAPACITY"],
+                                     error_rate=envs["IDENTIFIER_FILTER_ERROR_RATE"])
+
+
+def load_identifier_filter():
+    if not envs["IDENTIFIER_FILTER_ENABLED"]:
+        return
+    try:
+        identifier_filter.rebuild(User.iter_identifiers(), User.count_users() * 2)
+    except SQLAlchemyError as e:
+        identifier_filter.mark_stale()
+        print(f"Failed to build identifier filter: {e}")
+
+
+def identifier_may_exist(value: str) -> bool:
+    if not envs["IDENTIFIER_FILTER_ENABLED"]:
+        return True
+    exists = identifier_filter.may_exist(value)
+    identifier_lookups.inc(("maybe" if exists else "absent",))
+    return exists
+
+
+def publish_identifiers(values: Iterable[str]) -> bool:
+    if not redis_breaker.allow():
+        return False
+    try:
+        with rc.pipeline(transaction=False) as pipe:
+            for value in values:
+                pipe.publish(IDENTIFIER_CHANNEL, f"{NODE_ID} {value}")
+            pipe.execute()
+        redis_breaker.record_success()
+    except RedisError as e:
+        redis_breaker.record_failure()
+        print(f"Failed to publish identifier: {e}")
+        return False
+    return True
+
+
+# Identifiers whose publish failed. This node already holds them, but other nodes answer "absent" (404 on login)
+# for them until republish_identifiers gets through on a filter worker tick or those nodes rebuild; a node whose
+# own subscription dropped marks itself stale instead and goes to the database meanwhile.
+unpublished_identifiers = []
+
+
+def register_identifiers(*values: Optional[str]):
+    values = tuple(value for value in values if value)
+    identifier_filter.add(*values)
+    if not publish_identifiers(values):
+        unpublished_identifiers.extend(values)
+
+
+def republish_identifiers():
+    values = unpublished_identifiers[:]
+    if values and publish_identifiers(values):
+        del unpublished_identifiers[:len(values)]
+
+
+def mask_missing_user():
+    seconds = hashing.metrics()["avg_seconds"]
+    if seconds:
+        eventlet.sleep(seconds)
+    else:
+        generate_hash("missing-user")
+
+
+def _handle_identifier_added(message: dict):
+    node_id, _, value = message["data"].decode().partition(" ")
+    if node_id != NODE_ID:
+        identifier_filter.add(value)
+
+
+subscribe_channel(IDENTIFIER_CHANNEL, _handle_identifier_added, identifier_filter.mark_stale)
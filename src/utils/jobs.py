@@ -0,0 +1,118 @@
+from eventlet.queue import LightQueue, Full
+from flask import current_app
+from redis import RedisError
+from typing import Any, Dict, Optional
+from uuid import uuid4
+from eventlet import tpool
+import eventlet
+import os
+
+from src.configs import rc
+from src.utils import envs
+from src.models.user import User
+from src.utils.schema import serialize_user
+from src.utils.helpers import store_to_redis, emit_to_user
+from src.utils.uploads import spool_image, preprocess_image
+from src.utils.storage import StorageBackend, storage
+
+
+class UploadQueueFull(Exception):
+    pass
+
+
+class UploadStatusUnavailable(Exception):
+    pass
+
+
+class ImageJobRunner:
+    def __init__(self, storage: StorageBackend, workers: int, queue_limit: int, ttl: int = 3600):
+        self.storage = storage
+        self.workers = workers
+        self.ttl = ttl
+        self.__queue = LightQueue(maxsize=queue_limit)
+        self.__greenlets = []
+
+    def __start(self):
+        while len(self.__greenlets) < self.workers:
+            self.__greenlets.append(eventlet.spawn(self.__work))
+
+    def __set_status(self, job_id: str, **fields):
+        job_key = f"upload:{job_id}"
+        fields["job_id"] = job_id
+        with rc.pipeline(transaction=True) as pipe:
+            pipe.hset(job_key, mapping={key: "" if value is None else value for key, value in fields.items()})
+            pipe.expire(job_key, self.ttl)
+            pipe.execute()
+
+    def submit(self, user_id: str, image_file) -> Dict[str, Any]:
+        job_id = str(uuid4())
+        path = spool_image(image_file, envs["UPLOAD_MAX_BYTES"], envs["UPLOAD_SPOOL_DIR"],
+                           envs["UPLOAD_MAX_PIXELS"])
+
+        try:
+            self.__set_status(job_id, user_id=user_id, status="queued")
+            self.__queue.put_nowait((current_app._get_current_object(), job_id, user_id, path))
+        except Full as e:
+            os.remove(path)
+            raise UploadQueueFull("Too many pending image uploads!") from e
+        except RedisError as e:
+            os.remove(path)
+            raise UploadStatusUnavailable("Failed to record image job status!") from e
+
+        self.__start()
+        return {"job_id": job_id, "user_id": user_id, "status": "queued"}
+
+    def status(self, job_id: str) -> Optional[Dict[str, str]]:
+        job = rc.hgetall(f"upload:{job_id}")
+        if not job:
+            return None
+        return {key.decode(): value.decode() for key, value in job.items()}
+
+    def __work(self):
+        while True:
+            app, job_id, user_id, path = self.__queue.get()
+            with app.app_context():
+                try:
+                    self.__process(job_id, user_id, path)
+                except Exception as e:
+                    print(f"Image job {job_id} failed: {e}")
+                    try:
+                        self.__finish(job_id, user_id, "failed", error=str(e))
+                    except RedisError as e:
+                        print(f"Failed to record image job status: {e}")
+                finally:
+                    os.remove(path)
+
+    def __process(self, job_id: str, user_id: str, path: str):
+        self.__set_status(job_id, status="processing")
+        avatar_path = tpool.execute(preprocess_image, path, envs["AVATAR_SIZE"], envs["AVATAR_FORMAT"],
+                                    envs["AVATAR_QUALITY"], envs["UPLOAD_SPOOL_DIR"], envs["UPLOAD_MAX_PIXELS"])
+        try:
+            saved = tpool.execute(self.storage.save, avatar_path)
+        finally:
+            os.remove(avatar_path)
+
+        if not saved:
+            return self.__finish(job_id, user_id, "failed", error="Image file upload error!")
+
+        update_result, previous = User.replace_image(id=user_id, image=saved["url"], image_id=saved["object_id"])
+
+        if not update_result:
+            return self.__finish(job_id, user_id, "failed", error="Failed to update image!")
+
+        response_data = serialize_user(update_result)
+        store_to_redis("user", user_id, response_data, invalidate=True)
+
+        # the image this upload replaced, which may come from an overlapping upload rather than the one seen at submit
+        old_image_id = self.storage.resolve_object_id(previous.image_id, previous.image)
+        if old_image_id and old_image_id != saved["object_id"] and not User.image_in_use(old_image_id):
+            tpool.execute(self.storage.delete, old_image_id)
+
+        self.__finish(job_id, user_id, "done", image=saved["url"], image_id=saved["object_id"])
+
+    def __finish(self, job_id: str, user_id: str, status: str, **fields):
+        self.__set_status(job_id, status=status, **fields)
+        emit_to_user(user_id, "image-job", self.status(job_id))
+
+
+image_jobs = ImageJobRunner(storage=storage, workers=envs["UPLOAD_WORKERS"], queue_limit=envs["UPLOAD_QUEUE_LIMIT"])
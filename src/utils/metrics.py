@@ -0,0 +1,178 @@
+from flask import Flask, request
+from redis import Redis
+from redis.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextvars import ContextVar
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.__series: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.__series[labels] = self.__series.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in list(self.__series.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(total)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.__series: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self.__series.get(labels)
+        if series is None:
+            series = self.__series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total) in list(self.__series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {repr(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+def render_samples(name: str, help: str, samples: Dict[tuple, float], labels: Tuple[str, ...] = (),
+                   type: str = "gauge") -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+    for values, value in samples.items():
+        lines.append(f"{name}{_format_labels(labels, values)} {_format_value(value)}")
+    return lines
+
+
+request_latency = Histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                            ("method", "route", "status"))
+request_db_queries = Histogram("http_request_db_queries", "Database queries issued per HTTP request.",
+                               ("route",), COUNT_BUCKETS)
+request_db_seconds = Histogram("http_request_db_seconds", "Database time spent per HTTP request.", ("route",))
+request_redis_calls = Histogram("http_request_redis_calls", "Redis round trips per HTTP request.",
+                                ("route",), COUNT_BUCKETS)
+db_query_seconds = Histogram("db_query_duration_seconds", "Database cursor execution time.")
+redis_call_seconds = Histogram("redis_command_duration_seconds", "Redis round trip time by command.", ("command",))
+redis_pipelined_commands = Counter("redis_pipelined_commands_total", "Commands sent inside Redis pipelines.")
+socket_events = Counter("socketio_events_total", "Socket.IO connection events.", ("event",))
+
+registry = [request_latency, request_db_queries, request_db_seconds, request_redis_calls, db_query_seconds,
+            redis_call_seconds, redis_pipelined_commands, socket_events]
+
+# [started, db queries, db seconds, redis calls] for the active request
+_request_stats: ContextVar[Optional[list]] = ContextVar("request_stats", default=None)
+
+
+def record_redis(command: str, elapsed: float):
+    redis_call_seconds.observe((command,), elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats[3] += 1
+
+
+class InstrumentedPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True):
+        commands = len(self.command_stack)
+        started = perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            if commands:
+                record_redis("PIPELINE", perf_counter() - started)
+                redis_pipelined_commands.inc((), commands)
+
+
+class InstrumentedRedis(Redis):
+    def execute_command(self, *args, **options):
+        started = perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            record_redis(args[0], perf_counter() - started)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - context._metrics_started
+    db_query_seconds.observe((), elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats[1] += 1
+        stats[2] += elapsed
+
+
+def _start_request_timer():
+    _request_stats.set([perf_counter(), 0, 0.0, 0])
+
+
+def _stop_request_timer(response):
+    stats = _request_stats.get()
+    if stats is None:
+        return response
+    _request_stats.set(None)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    request_latency.observe((request.method, route, response.status_code), perf_counter() - stats[0])
+    request_db_queries.observe((route,), stats[1])
+    request_db_seconds.observe((route,), stats[2])
+    request_redis_calls.observe((route,), stats[3])
+    return response
+
+
+def init_metrics(app: Flask):
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start_request_timer)
+    app.after_request(_stop_request_timer)
+
+
+def render_metrics(extra: Iterable[List[str]] = ()) -> str:
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    for block in extra:
+        lines.extend(block)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,151 @@
+from flask import request, session
+from redis import RedisError
+from collections import OrderedDict
+from functools import wraps
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, Optional, Tuple
+import math
+
+from src.configs import rc
+from src.utils import envs
+from src.utils.response import ApiResponse
+from src.utils.helpers import redis_breaker
+from src.utils.metrics import Counter, registry
+
+
+# GCRA over integer milliseconds, returns {allowed, retry_after_ms}
+gcra_script = rc.register_script("""
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = interval * tonumber(ARGV[2])
+local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+if now + tolerance - tat < interval then
+    return {0, tat + interval - tolerance - now}
+end
+tat = tat + interval
+redis.call("SET", KEYS[1], tat, "PX", tat - now)
+return {1, 0}
+""")
+
+rate_limited = Counter("rate_limited_total", "Requests rejected by the rate limiter.", ("route", "scope"))
+registry.append(rate_limited)
+
+
+def parse_limits(value: str) -> Dict[str, Tuple[int, int]]:
+    limits = {}
+    for rule in value.split(","):
+        name, _, spec = rule.strip().partition("=")
+        limit, _, period = spec.partition("/")
+        try:
+            limits[name.strip()] = (int(limit), int(period))
+        except ValueError:
+            print(f"Ignoring invalid rate limit rule: '{rule}'")
+    return limits
+
+
+class RateLimiter:
+    def __init__(self, name: str, limit: int, period: int, local_size: int):
+        self.name = name
+        self.limit = limit
+        self.interval_ms = max(1, math.ceil(period * 1000 / limit))
+        self.local_size = local_size
+        self.__lock = Lock()
+        self.__denials: OrderedDict[str, float] = OrderedDict()
+
+    def __deny(self, key: str, until: float):
+        with self.__lock:
+            self.__denials[key] = until
+            self.__denials.move_to_end(key)
+            while len(self.__denials) > self.local_size:
+                self.__denials.popitem(last=False)
+
+    def __check(self, key: str) -> Optional[Tuple[int, int]]:
+        if not redis_breaker.allow():
+            return None
+        try:
+            allowed, retry_ms = gcra_script(keys=[key], args=[self.interval_ms, self.limit])
+            redis_breaker.record_success()
+            return int(allowed), int(retry_ms)
+        except RedisError as e:
+            redis_breaker.record_failure()
+            print(f"Rate limiter unavailable, allowing request: {e}")
+            return None
+
+    # every admission goes through the GCRA in Redis; only denials are cached, since the GCRA would
+    # refuse the same key until its retry time anyway
+    def hit(self, identity: str) -> Optional[float]:
+        key = f"ratelimit:{self.name}:{identity}"
+        now = monotonic()
+
+        with self.__lock:
+            denied_until = self.__denials.get(key)
+            if denied_until is not None:
+                if denied_until > now:
+                    return denied_until - now
+                del self.__denials[key]
+
+        checked = self.__check(key)
+        if checked is None:
+            return None
+
+        allowed, retry_ms = checked
+        if allowed:
+            return None
+
+        self.__deny(key, now + retry_ms / 1000)
+        return retry_ms / 1000
+
+
+def client_ip() -> Optional[str]:
+    if envs["RATE_LIMIT_TRUST_PROXY"] and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr
+
+
+def session_uid() -> Optional[str]:
+    return session.get("uid")
+
+
+def login_identifier() -> Optional[str]:
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return None
+    identifier = payload.get("email") or payload.get("username")
+    if not isinstance(identifier, str) or not identifier:
+        return None
+    return sha256(identifier.strip().lower().encode("utf-8")).hexdigest()[:32]
+
+
+SCOPES: Dict[str, Callable[[], Optional[str]]] = {"ip": client_ip, "user": session_uid, "identifier": login_identifier}
+
+limiters = {name: RateLimiter(name, limit, period, envs["RATE_LIMIT_LOCAL_SIZE"])
+            for name, (limit, period) in parse_limits(envs["RATE_LIMITS"]).items() if limit > 0 and period > 0}
+
+
+def rate_limit(name: str, scopes: Tuple[str, ...] = ("ip",)):
+    def decorator(func):
+        limiter = limiters.get(name)
+        if not envs["RATE_LIMIT_ENABLED"] or limiter is None:
+            return func
+
+        @wraps(func)
+        def limited_function(*args, **kwargs):
+            for scope in scopes:
+                identity = SCOPES[scope]()
+                if identity is None:
+                    continue
+                retry_after = limiter.hit(f"{scope}:{identity}")
+                if retry_after is not None:
+                    rate_limited.inc((name, scope))
+                    response = ApiResponse(429, "Too many requests, please try again later!")
+                    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+                    return response
+            return func(*args, **kwargs)
+        return limited_function
+    return decorator
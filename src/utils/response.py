@@ -1,4 +1,24 @@
+from flask.json.provider import DefaultJSONProvider
 from flask import make_response, jsonify
+import msgspec
+
+
+class MsgspecJSONProvider(DefaultJSONProvider):
+    encoder = msgspec.json.Encoder(enc_hook=DefaultJSONProvider.default)
+    decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.encoder.encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        try:
+            return self.decoder.decode(s)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encoder.encode(obj) + b"\n", mimetype=self.mimetype)
 
 
 class ApiResponse:
@@ -1,5 +1,9 @@
 from marshmallow import Schema, fields, validate, validates_schema, ValidationError
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+from sqlalchemy import DateTime
+from datetime import timezone
+from typing import Any, Callable, Dict
+import msgspec
 
 from src.models.user import User
 
@@ -65,6 +69,51 @@ class UserDataSchema(SQLAlchemyAutoSchema):
         super().__init__(*args, **kwargs)
 
 
+class UserProfile(msgspec.Struct):
+    id: str
+    email: str
+    name: str | None = None
+    username: str | None = None
+    gender: str | None = None
+    image: str | None = None
+    image_id: str | None = None
+    bio: str | None = None
+    setup: bool | None = None
+    created_at: str | None = None
+    updated_at: str | None = None
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+# naive columns come back from the database without an offset, so fresh in-memory aware values must match them
+def _naive_isoformat(value):
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return _isoformat(value)
+
+
+def compile_serializer(model, exclude=("password",)) -> Callable[[Any], Dict[str, Any]]:
+    items = []
+
+    for column in model.__table__.columns:
+        if column.key in exclude:
+            continue
+        if isinstance(column.type, DateTime):
+            formatter = "_isoformat" if column.type.timezone else "_naive_isoformat"
+            items.append(f"{column.key!r}: {formatter}(obj.{column.key})")
+        else:
+            items.append(f"{column.key!r}: obj.{column.key}")
+
+    source = f"def serialize(obj):\n    return {{{', '.join(items)}}}\n"
+    namespace = {"_isoformat": _isoformat, "_naive_isoformat": _naive_isoformat}
+    exec(compile(source, f"<{model.__name__} serializer>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+serialize_user = compile_serializer(User)
+
 user_data_schema = UserDataSchema()
 users_data_schema = UserDataSchema(many=True)
 login_data_schema = UserDataSchema(exclude=False)
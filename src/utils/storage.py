@@ -0,0 +1,105 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+from tempfile import mkstemp
+from hashlib import sha256
+import shutil
+import os
+
+from src.utils import envs
+from src.utils.uploads import upload_image_on_cloudinary, delete_image_from_cloudinary, extract_uuid_from_url
+
+
+class StorageBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def save(self, path: str) -> Optional[Dict[str, str]]:
+        pass
+
+    @abstractmethod
+    def delete(self, object_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def object_id_from_url(self, url: str) -> Optional[str]:
+        pass
+
+    def resolve_object_id(self, image_id: Optional[str], image_url: Optional[str]) -> Optional[str]:
+        if image_id:
+            return image_id
+        return self.object_id_from_url(image_url) if image_url else None
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+
+    def save(self, path: str) -> Optional[Dict[str, str]]:
+        upload_result = upload_image_on_cloudinary(path) or {}
+        secure_url = upload_result.get("secure_url")
+        public_id = upload_result.get("public_id")
+
+        if not secure_url or not public_id:
+            return None
+
+        return {"object_id": public_id.rsplit("/", 1)[-1], "url": secure_url}
+
+    def delete(self, object_id: str) -> bool:
+        return delete_image_from_cloudinary(object_id)
+
+    def object_id_from_url(self, url: str) -> Optional[str]:
+        return extract_uuid_from_url(url)
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path_for(self, object_id: str) -> Optional[str]:
+        path = os.path.join(self.root, os.path.basename(object_id))
+        return path if os.path.isfile(path) else None
+
+    def save(self, path: str) -> Optional[Dict[str, str]]:
+        digest = sha256()
+        with open(path, "rb") as source:
+            while chunk := source.read(64 * 1024):
+                digest.update(chunk)
+
+        object_id = f"{digest.hexdigest()}{os.path.splitext(path)[1]}"
+        target = os.path.join(self.root, object_id)
+
+        if not os.path.exists(target):
+            os.makedirs(self.root, exist_ok=True)
+            descriptor, temp_path = mkstemp(prefix=".upload-", dir=self.root)
+            os.close(descriptor)
+            shutil.copyfile(path, temp_path)
+            os.replace(temp_path, target)
+
+        return {"object_id": object_id, "url": f"{self.base_url}/{object_id}"}
+
+    def delete(self, object_id: str) -> bool:
+        path = self.path_for(object_id)
+        if not path:
+            return False
+        try:
+            os.remove(path)
+            return True
+        except OSError as e:
+            print(f"Error while file delete: {e}")
+            return False
+
+    def object_id_from_url(self, url: str) -> Optional[str]:
+        if not url.startswith(f"{self.base_url}/"):
+            return None
+        return url[len(self.base_url) + 1:]
+
+
+def create_storage() -> StorageBackend:
+    if envs["STORAGE_BACKEND"] == "local":
+        return LocalStorage(root=envs["LOCAL_STORAGE_DIR"], base_url=envs["LOCAL_STORAGE_URL"])
+    return CloudinaryStorage()
+
+
+storage = create_storage()
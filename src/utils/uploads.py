@@ -1,9 +1,14 @@
+from PIL import Image, ImageOps, UnidentifiedImageError
 from dotenv import load_dotenv
+from tempfile import mkstemp
 from uuid import uuid4
 import cloudinary.uploader
 import cloudinary
+import os
 import re
 
+from src.utils import envs
+
 load_dotenv()
 
 config = cloudinary.config(secure=True)
@@ -46,4 +51,98 @@ def extract_uuid_from_url(url: str) -> str | None:
     return match.group(1) if match else None
 
 
+# image preprocessing before storage
+
+class InvalidImage(ValueError):
+    pass
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+IMAGE_SIGNATURES = {
+    "jpeg": (b"\xff\xd8\xff",),
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "gif": (b"GIF87a", b"GIF89a"),
+    "webp": (b"RIFF",)
+}
+
+IMAGE_EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg", "PNG": ".png"}
+
+# Pillow raises DecompressionBombError past twice this many pixels, as a backstop to check_image_pixels
+Image.MAX_IMAGE_PIXELS = envs["UPLOAD_MAX_PIXELS"]
+
+
+def sniff_image_type(header: bytes) -> str | None:
+    for image_type, signatures in IMAGE_SIGNATURES.items():
+        if header.startswith(signatures):
+            if image_type == "webp" and header[8:12] != b"WEBP":
+                continue
+            return image_type
+    return None
+
+
+def check_image_pixels(path: str, max_pixels: int):
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e)) from e
+    except UnidentifiedImageError as e:
+        raise InvalidImage("Image file is corrupted!") from e
+    if width * height > max_pixels:
+        raise ImageTooLarge(f"Image must be at most {max_pixels} pixels, got {width}x{height}!")
+
+
+# Werkzeug has already buffered the whole multipart body (in memory or a temp file) by the time this reads
+# request.files, so MAX_CONTENT_LENGTH is the real cap on upload size; max_bytes only bounds what gets spooled
+def spool_image(image_file, max_bytes: int, spool_dir: str | None = None, max_pixels: int | None = None,
+                chunk_size: int = 64 * 1024) -> str:
+    descriptor, path = mkstemp(prefix="upload-", dir=spool_dir)
+    total = 0
+
+    try:
+        with os.fdopen(descriptor, "wb") as spool_file:
+            while chunk := image_file.stream.read(chunk_size):
+                if total == 0 and sniff_image_type(chunk[:12]) is None:
+                    raise InvalidImage("Only JPEG, PNG, GIF and WEBP images are allowed!")
+                total += len(chunk)
+                if total > max_bytes:
+                    raise ImageTooLarge(f"Image must be smaller than {max_bytes // 1024} KB!")
+                spool_file.write(chunk)
+        if total == 0:
+            raise InvalidImage("Image file is empty!")
+        if max_pixels:
+            check_image_pixels(path, max_pixels)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return path
+
+
+def preprocess_image(path: str, size: int, image_format: str = "WEBP", quality: int = 80,
+                     spool_dir: str | None = None, max_pixels: int | None = None) -> str:
+    if max_pixels:
+        check_image_pixels(path, max_pixels)
+
+    with Image.open(path) as image:
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        if image_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        descriptor, output_path = mkstemp(prefix="avatar-", suffix=IMAGE_EXTENSIONS.get(image_format, ""),
+                                          dir=spool_dir)
+        with os.fdopen(descriptor, "wb") as output_file:
+            image.save(output_file, format=image_format, quality=quality, optimize=True)
+
+    return output_path
+
+
 # print("****Cloudinary Configuration SDK:****\nCredentials:", config.cloud_name, config.api_key, "\n")
@@ -0,0 +1,22 @@
+from flask import Blueprint, send_file
+
+from src.utils.response import ApiResponse
+from src.utils.storage import storage, LocalStorage
+from src.utils import envs
+
+
+media = Blueprint("media", __name__, url_prefix=envs["LOCAL_STORAGE_URL"])
+
+
+# Api route for serve local avatars - "/media/avatars/<object_id>"
+@media.route("/<object_id>", methods=["GET"])
+def serve_avatar(object_id):
+    path = storage.path_for(object_id) if isinstance(storage, LocalStorage) else None
+
+    if not path:
+        return ApiResponse(404, "Image file not found!")
+
+    response = send_file(path, etag=object_id.split(".")[0], conditional=True, max_age=31536000)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
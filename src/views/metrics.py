@@ -0,0 +1,77 @@
+from flask import Blueprint, Response, request
+from redis import RedisError
+from hmac import compare_digest
+
+from src.configs import pool_status
+from src.utils import envs
+from src.utils.response import ApiResponse
+from src.utils.hashing import hashing
+from src.utils.helpers import cache_stats, count_connected_users, get_node_sockets
+from src.utils.metrics import render_metrics, render_samples
+
+
+metrics = Blueprint("metrics", __name__)
+
+
+def collect_hashing():
+    stats = hashing.metrics()
+    return [
+        *render_samples("bcrypt_calls_total", "Completed bcrypt operations.", {(): stats["calls"]}, type="counter"),
+        *render_samples("bcrypt_rejected_total", "Bcrypt operations rejected by the queue limit.",
+                        {(): stats["rejected"]}, type="counter"),
+        *render_samples("bcrypt_errors_total", "Failed bcrypt operations.", {(): stats["errors"]}, type="counter"),
+        *render_samples("bcrypt_seconds_total", "Total time spent in bcrypt.", {(): stats["total_seconds"]},
+                        type="counter"),
+        *render_samples("bcrypt_seconds_max", "Slowest bcrypt operation.", {(): stats["max_seconds"]}),
+        *render_samples("bcrypt_seconds_avg", "Average bcrypt operation time.", {(): stats["avg_seconds"]}),
+        *render_samples("bcrypt_pending", "Bcrypt operations in flight.", {(): stats["pending"]}),
+        *render_samples("bcrypt_rounds", "Bcrypt cost factor for new hashes.", {(): stats["rounds"]})
+    ]
+
+
+def collect_cache():
+    stats = cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    return [
+        *render_samples("local_cache_events_total", "Local profile cache events.",
+                        {(key,): stats[key] for key in ("hits", "misses", "evictions", "invalidations")},
+                        ("event",), type="counter"),
+        *render_samples("local_cache_hit_ratio", "Local profile cache hit ratio.",
+                        {(): stats["hits"] / lookups if lookups else 0}),
+        *render_samples("local_cache_size", "Entries in the local profile cache.", {(): stats["size"]}),
+        *render_samples("cache_fill_events_total", "Profile cache fill events.",
+                        {(key,): stats[key] for key in ("fills", "coalesced", "early_refreshes", "lock_waits")},
+                        ("event",), type="counter"),
+        *render_samples("redis_breaker_open", "Whether the Redis circuit breaker is open.",
+                        {(): int(stats["breaker"] != "closed")})
+    ]
+
+
+def collect_pools():
+    samples = {}
+    for bind_key, snapshot in pool_status().items():
+        for key, value in snapshot.items():
+            if isinstance(value, (int, float)):
+                samples[(bind_key, key)] = value
+    return [*render_samples("db_pool", "Database connection pool state.", samples, ("bind", "field"))]
+
+
+def collect_sockets():
+    try:
+        samples = {("users",): count_connected_users(), ("node_sockets",): len(get_node_sockets())}
+    except RedisError as e:
+        print(f"Failed to collect socket metrics: {e}")
+        return []
+    return [*render_samples("socketio_connections", "Connected Socket.IO users and sockets on this node.",
+                            samples, ("kind",))]
+
+
+# Api route for prometheus metrics - "/metrics"
+@metrics.route("/metrics", methods=["GET"])
+def get_metrics():
+    token = envs["METRICS_TOKEN"]
+    if token and not compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return ApiResponse(401, "Unauthorized metrics access!")
+
+    body = render_metrics([collect_hashing(), collect_cache(), collect_pools(), collect_sockets()])
+    return Response(body, mimetype="text/plain; version=0.0.4")
@@ -1,70 +1,75 @@
-from flask import Blueprint, request, session, g, make_response
-from bcrypt import hashpw, gensalt, checkpw
+from werkzeug.exceptions import RequestEntityTooLarge
+from sqlalchemy.exc import IntegrityError
+from redis import RedisError
+from flask import Blueprint, request, session, g, current_app, make_response
 from marshmallow import ValidationError
 from functools import wraps
-from logging import getLogger
+from logging import getLogger, INFO
+from typing import Optional
 
-from src.configs import db, rc
+from src.configs import db
 from src.models.user import User
 from src.utils.response import ApiResponse
-from src.utils.uploads import upload_image_on_cloudinary, delete_image_from_cloudinary, extract_uuid_from_url
+from src.utils.hashing import generate_hash, verify_hash, needs_rehash, HashQueueFull
+from src.utils.uploads import InvalidImage, ImageTooLarge
+from src.utils.storage import storage
+from src.utils.jobs import image_jobs, UploadQueueFull, UploadStatusUnavailable
+from src.utils.ratelimit import rate_limit
+from src.utils.identifiers import identifier_may_exist, register_identifiers, mask_missing_user
 from src.utils.helpers import (has_empty_field, global_session_user, clear_session_cookies, store_to_redis, 
-                               retrieve_from_redis)
-from src.utils.schema import (register_user_schema, login_user_schema, user_data_schema, login_data_schema,
-                              update_user_schema, change_password_schema)
+                               load_through_cache, evict_from_cache, retrieve_etag, content_etag)
+from src.utils.schema import (register_user_schema, login_user_schema, update_user_schema, change_password_schema,
+                              serialize_user)
 
 
 user = Blueprint("user", __name__, url_prefix="/api/user")
 
 
-def generate_hash(plain_text: str) -> str:
-    return hashpw(plain_text.encode("utf-8"), gensalt()).decode()
-
-
-def verify_hash(plain_text: str, hashed_text: str) -> bool:
-    return checkpw(plain_text.encode("utf-8"), hashed_text.encode("utf-8"))
-
-
-@user.before_request
-def before_request():
-    global_session_user()
+logger = getLogger("session")
 
 
 @user.after_request
 def after_request(response):
-    global_session_user()
-    logger = getLogger("session")
-    logger.info(f" * Session is active for {g.user}@{g.uid}")
+    if session.loaded and logger.isEnabledFor(INFO):
+        global_session_user()
+        logger.info(" * Session is active for %s@%s", g.user, g.uid)
     return response
 
 
 # Api route for register user - "/api/users/register"
 @user.route("/register", methods=["POST"])
+@rate_limit("register", scopes=("ip",))
 def register_user():
     try:
         user_data = register_user_schema.load(request.get_json())
 
-        if User.query.filter(User.email == user_data["email"]).first():
-            return ApiResponse(409, "Email already exits!")
-
         hashed_password = generate_hash(user_data["password"])
 
         new_user = User(email=user_data["email"], password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
-        created_user = user_data_schema.dump(new_user)
+        register_identifiers(new_user.email)
+        created_user = serialize_user(new_user)
 
         return ApiResponse(201, "User registered successfully!", created_user)
 
+    except IntegrityError:
+        db.session.rollback()
+        return ApiResponse(409, "Email already exits!")
+
     except ValidationError as e:
         return ApiResponse(400, "Validation errors occurred!", None, e.messages)
 
+    except HashQueueFull as e:
+        return ApiResponse(503, "Server is busy, please try again later!", None, str(e))
+
     except Exception as e:
         return ApiResponse(500, "An unexpected error occurred!", None, str(e))
 
 
 # Api route for login user - "/api/users/login"
 @user.route("/login", methods=["POST"])
+@rate_limit("login", scopes=("ip", "identifier"))
 def login_user():
     try:
         login_data = login_user_schema.load(request.get_json())
@@ -84,30 +89,39 @@ def login_user():
         for key, value in fields.items():
             if value:
                 session_key = key
-                exists_user = User.query.filter_by(**{key: value}).first()
+                exists_user = User.find_by_identifier(key, value) if identifier_may_exist(value) else None
                 break
 
         if not exists_user:
             clear_session_cookies()
+            mask_missing_user()
             return ApiResponse(404, "User not found!")
         
-        user_data = login_data_schema.dump(exists_user)
-        is_verified = verify_hash(password, user_data["password"])
+        is_verified = verify_hash(password, exists_user.password)
 
         if not is_verified:
             clear_session_cookies()
             return ApiResponse(403, "Incorrect password!")
 
-        session[session_key] = user_data[session_key]
-        session["uid"] = user_data["id"]
+        session[session_key] = getattr(exists_user, session_key)
+        session["uid"] = exists_user.id
+
+        if needs_rehash(exists_user.password):
+            try:
+                exists_user = User.update_user(id=exists_user.id, data={"password": generate_hash(password)})
+            except HashQueueFull as e:
+                print(f"Skipping password rehash: {e}")
 
-        response_data = user_data_schema.dump(exists_user)
+        response_data = serialize_user(exists_user)
         store_to_redis("user", response_data["id"], response_data)
         return ApiResponse(200, "User login successfully!", response_data)
     
     except ValidationError as e:
         return ApiResponse(400, "Validation errors occurred!", None, e.messages)
 
+    except HashQueueFull as e:
+        return ApiResponse(503, "Server is busy, please try again later!", None, str(e))
+
     except Exception as e:
         return ApiResponse(500, "An unexpected error occurred!", None, str(e))
 
@@ -115,33 +129,37 @@ def login_user():
 # Api route for logout user - "/api/users/logout"
 @user.route("/logout", methods=["GET", "DELETE"])
 def logout_user():
+    try:
+        current_app.session_interface.destroy_session(session)
+    except RedisError as e:
+        return ApiResponse(503, "Failed to logout, please try again later!", None, str(e))
+
     session_value = clear_session_cookies()
-    rc.delete(f"user:{session_value['uid']}")
-    response = make_response(session_value)
-    response.set_cookie("session", "", expires=0)
-    return ApiResponse(response.status_code, "User logout successfully!")
+    if session_value["uid"]:
+        evict_from_cache("user", session_value["uid"])
+    return ApiResponse(200, "User logout successfully!")
 
 
 # Login required decorator function for access session user
+def load_session_user(**filters) -> Optional[dict]:
+    session_user = User.query.filter_by(**filters).first()
+    return serialize_user(session_user) if session_user else None
+
+
 def login_required(func):
     @wraps(func)
     def secure_function(*args, **kwargs):
+        global_session_user()
         if any(key in session for key in ["username", "email"]):
             session_key = next((key for key in ["username", "email"] if key in session), None)
             session_uid = session.get("uid")
 
             if session_key and session_uid:
-                cache_data = retrieve_from_redis("user", session_uid)
-                
-                if cache_data is not None:
-                    return func(cache_data, session_uid, *args, **kwargs)
+                user_data = load_through_cache("user", session_uid, lambda: load_session_user(
+                    **{session_key: session[session_key], "id": session_uid}))
 
-                session_user = User.query.filter_by(**{session_key: session[session_key], "id": session_uid}).first()
-
-                if session_user:
-                    query_data = user_data_schema.dump(session_user)
-                    store_to_redis("user", session_uid, query_data)
-                    return func(query_data, session_uid, *args, **kwargs)
+                if user_data is not None:
+                    return func(user_data, session_uid, *args, **kwargs)
 
             return func(*args, **kwargs)
         else:
@@ -149,12 +167,35 @@ def login_required(func):
     return secure_function
 
 
+def conditional_profile(func):
+    @wraps(func)
+    def conditional_function(*args, **kwargs):
+        session_uid = session.get("uid") if request.if_none_match else None
+
+        if session_uid:
+            etag = retrieve_etag("user", session_uid)
+            if etag and request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+                response.set_etag(etag)
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+                return response
+
+        return func(*args, **kwargs)
+    return conditional_function
+
+
 # Api route for check session user - "/api/user/user-information"
 @user.route("/user-information", methods=["GET"])
+@conditional_profile
 @login_required
 def get_session_user(session_user, session_uid, *args, **kwargs):
     if g.user and g.uid and session_user:
-        return ApiResponse(200, "User information!", session_user)
+        response = ApiResponse(200, "User information!", session_user)
+        response.set_etag(content_etag(session_user))
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
     return ApiResponse(401, "Unauthorized user!")
 
 
@@ -179,8 +220,10 @@ def update_user(session_user, session_uid, *args, **kwargs):
         update_result = User.update_user(id=session_uid, data=user_data)
 
         if update_result:
-            response_data = user_data_schema.dump(update_result)
-            store_to_redis("user", session_uid, response_data)
+            if username != session_user["username"]:
+                register_identifiers(username)
+            response_data = serialize_user(update_result)
+            store_to_redis("user", session_uid, response_data, invalidate=True)
             return ApiResponse(200, "Profile updated successfully!", response_data)
 
         return ApiResponse(400, "Profile update not completed!")
@@ -194,6 +237,7 @@ def update_user(session_user, session_uid, *args, **kwargs):
 
 # Api route for change user password - "/api/user/change-password"
 @user.route("/change-password", methods=["PUT", "PATCH"])
+@rate_limit("change-password", scopes=("ip", "user"))
 @login_required
 def change_password(session_user, session_uid, *args, **kwargs):
     try:
@@ -206,9 +250,8 @@ def change_password(session_user, session_uid, *args, **kwargs):
             return ApiResponse(400, "Please, choose a different password!")
 
         req_user = User.query.filter_by(id=session_uid).first()
-        req_data = login_data_schema.dump(req_user)
 
-        is_verified = verify_hash(old_password, req_data["password"])
+        is_verified = verify_hash(old_password, req_user.password)
 
         if not is_verified:
             return ApiResponse(403, "Incorrect old password!")
@@ -218,8 +261,8 @@ def change_password(session_user, session_uid, *args, **kwargs):
         update_result = User.update_user(id=session_uid, data={"password": hashed_password})
 
         if update_result:
-            response_data = user_data_schema.dump(update_result)
-            store_to_redis("user", session_uid, response_data)
+            response_data = serialize_user(update_result)
+            store_to_redis("user", session_uid, response_data, invalidate=True)
             return ApiResponse(200, "Password changed successfully!", response_data)
 
         return ApiResponse(400, "Password cannot changed!")
@@ -227,6 +270,9 @@ def change_password(session_user, session_uid, *args, **kwargs):
     except ValidationError as e:
         return ApiResponse(400, "Validation errors occurred!", None, e.messages)
 
+    except HashQueueFull as e:
+        return ApiResponse(503, "Server is busy, please try again later!", None, str(e))
+
     except Exception as e:
         return ApiResponse(500, "An unexpected error occurred!", None, str(e))
     
@@ -243,29 +289,37 @@ def update_image(session_user, session_uid, *args, **kwargs):
         if image_file.filename == "":
             return ApiResponse(400, "No any selected file!")
 
-        if session_user["image"] and session_user["image"] != "":
-            public_uuid = extract_uuid_from_url(session_user["image"])
-            delete_image_from_cloudinary(public_uuid)
-
-        upload_result = upload_image_on_cloudinary(image_file)
+        job = image_jobs.submit(session_uid, image_file)
+        return ApiResponse(202, "Image upload accepted!", job)
 
-        secure_url = upload_result.get("secure_url")
-        public_id = upload_result.get("public_id")
+    except (ImageTooLarge, RequestEntityTooLarge) as e:
+        return ApiResponse(413, "Image file is too large!", None, str(e))
 
-        if not secure_url or not public_id:
-            return ApiResponse(500, "Image file upload error!")
-        
-        update_result = User.update_user(id=session_uid, data={"image": secure_url})
+    except InvalidImage as e:
+        return ApiResponse(400, "Invalid image file!", None, str(e))
 
-        if update_result:
-            response_data = user_data_schema.dump(update_result)
-            store_to_redis("user", session_uid, response_data)
-            return ApiResponse(200, "Image uploaded successfully!", response_data)
+    except UploadQueueFull as e:
+        return ApiResponse(503, "Server is busy, please try again later!", None, str(e))
 
-        return ApiResponse(400, "Failed to update image!")
+    except UploadStatusUnavailable as e:
+        return ApiResponse(503, "Image upload is temporarily unavailable, please try again later!", None, str(e))
 
     except Exception as e:
         return ApiResponse(500, "An unexpected error occurred!", None, str(e))
+
+
+@user.route("/image-jobs/<job_id>", methods=["GET"])
+@login_required
+def get_image_job(session_user, session_uid, job_id, *args, **kwargs):
+    try:
+        job = image_jobs.status(job_id)
+    except RedisError as e:
+        return ApiResponse(503, "Image job status is temporarily unavailable, please try again later!", None, str(e))
+
+    if not job or job["user_id"] != session_uid:
+        return ApiResponse(404, "Image job not found!")
+
+    return ApiResponse(200, "Image job status!", job)
     
 
 @user.route("/delete-image", methods=["DELETE"])
@@ -273,14 +327,17 @@ def update_image(session_user, session_uid, *args, **kwargs):
 def delete_image(session_user, session_uid, *args, **kwargs):
     try:
         if session_user["image"] and session_user["image"] != "":
-            public_uuid = extract_uuid_from_url(session_user["image"])
-            result = delete_image_from_cloudinary(public_uuid)
+            image_id = storage.resolve_object_id(session_user.get("image_id"), session_user["image"])
+            result = True
+
+            if image_id and not User.image_in_use(image_id, exclude_id=session_uid):
+                result = storage.delete(image_id)
 
             if result:
-                update_result = User.update_user(id=session_uid, data={"image": None})
+                update_result = User.update_user(id=session_uid, data={"image": None, "image_id": None})
                 if update_result:
-                    response_data = user_data_schema.dump(update_result)
-                    store_to_redis("user", session_uid, response_data)
+                    response_data = serialize_user(update_result)
+                    store_to_redis("user", session_uid, response_data, invalidate=True)
                     return ApiResponse(200, "Image deleted successfully!", response_data)
                 
             return ApiResponse(400, "Failed to delete image!")
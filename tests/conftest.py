@@ -0,0 +1,5 @@
+import os
+
+os.environ.setdefault("DATABASE_URI", "sqlite://")
+os.environ.setdefault("REDIS_URI", "redis://localhost:6379/0")
+os.environ.setdefault("SECRET_KEY", "test-secret")
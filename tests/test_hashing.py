@@ -0,0 +1,17 @@
+import pytest
+
+from src.utils.hashing import HashingService, HASHING_MODES, _hash_password, _check_password
+
+
+@pytest.mark.parametrize("mode", ["process", "threads", ""])
+def test_unknown_mode_is_rejected(mode):
+    with pytest.raises(ValueError):
+        HashingService(mode=mode, pool_size=1, queue_limit=1, rounds=4)
+
+
+@pytest.mark.parametrize("mode", HASHING_MODES)
+def test_supported_modes_hash_and_verify(mode):
+    service = HashingService(mode=mode, pool_size=1, queue_limit=4, rounds=4)
+    hashed = service.execute(_hash_password, b"pw", service.rounds)
+    assert service.execute(_check_password, b"pw", hashed)
+    assert not service.execute(_check_password, b"other", hashed)
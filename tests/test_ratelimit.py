@@ -0,0 +1,45 @@
+import fakeredis
+import pytest
+
+from src.utils import ratelimit
+from src.utils.ratelimit import RateLimiter
+
+
+@pytest.fixture(autouse=True)
+def fake_gcra(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(ratelimit, "gcra_script", client.register_script(ratelimit.gcra_script.script))
+    return client
+
+
+def workers(count: int, limit: int, period: int):
+    return [RateLimiter("test", limit, period, local_size=100) for _ in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 4])
+def test_burst_is_shared_across_workers(count):
+    limiters = workers(count, limit=5, period=600)
+    results = [limiters[index % count].hit("ip:1") for index in range(5)]
+    assert results == [None] * 5
+
+
+@pytest.mark.parametrize("count", [1, 3])
+def test_workers_never_admit_more_than_the_limit(count):
+    limiters = workers(count, limit=10, period=60)
+    admitted = sum(limiters[index % count].hit("ip:1") is None for index in range(100))
+    assert admitted == 10
+
+
+def test_denial_is_cached_with_retry_after():
+    first, second = workers(2, limit=1, period=60)
+    assert first.hit("ip:1") is None
+    retry_after = second.hit("ip:1")
+    assert retry_after is not None and 0 < retry_after <= 60
+    assert second.hit("ip:1") <= retry_after
+
+
+def test_identities_are_limited_separately():
+    first, second = workers(2, limit=1, period=60)
+    assert first.hit("ip:1") is None
+    assert second.hit("ip:2") is None
+    assert first.hit("ip:2") is not None
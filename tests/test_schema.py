@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+
+from src.models.user import User
+from src.utils.schema import compile_serializer, serialize_user, user_data_schema, login_data_schema
+
+
+HASHED_PASSWORD = "$2b$12$abcdefghijklmnopqrstuuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0"
+
+
+def make_user(**values):
+    user = User(email=values.pop("email", "shekhar@example.com"), password=HASHED_PASSWORD)
+    for key, value in values.items():
+        setattr(user, key, value)
+    return user
+
+
+FULL_USER = dict(id="3f9c2a4e-8b1d-4c7a-9e2f-5a6b7c8d9e0f", name="Shekhar Sharma", username="shekharsikku",
+                 gender="Male", image="https://example.com/avatar.webp", image_id="avatar.webp", bio="Hello!",
+                 setup=True, created_at=datetime(2025, 5, 1, 10, 15, 30, 123456),
+                 updated_at=datetime(2025, 5, 2, 8, 0, 0, 654321))
+
+USERS = {
+    "full": FULL_USER,
+    "nullable fields": dict(FULL_USER, name=None, username=None, gender=None, image=None, image_id=None, bio=None,
+                            setup=False),
+    "missing attributes": dict(id="5a6b7c8d-8b1d-4c7a-9e2f-3f9c2a4e9e0f"),
+    "datetime without microseconds": dict(FULL_USER, created_at=datetime(2025, 1, 1), updated_at=None)
+}
+
+
+@pytest.mark.parametrize("values", USERS.values(), ids=USERS.keys())
+def test_serialize_user_matches_user_data_schema(values):
+    user = make_user(**values)
+    assert serialize_user(user) == user_data_schema.dump(user)
+
+
+@pytest.mark.parametrize("values", USERS.values(), ids=USERS.keys())
+def test_serializer_with_password_matches_login_schema(values):
+    user = make_user(**values)
+    assert compile_serializer(User, exclude=())(user) == login_data_schema.dump(user)
+
+
+def test_password_is_excluded():
+    data = serialize_user(make_user(**FULL_USER))
+    assert "password" not in data
+    assert "password" not in user_data_schema.dump(make_user(**FULL_USER))
+
+
+def test_datetimes_are_isoformat_strings():
+    data = serialize_user(make_user(**FULL_USER))
+    assert data["created_at"] == "2025-05-01T10:15:30.123456"
+    assert data["updated_at"] == "2025-05-02T08:00:00.654321"
+
+
+def test_aware_datetimes_render_like_naive_database_values():
+    aware = make_user(**dict(FULL_USER, created_at=datetime(2025, 5, 1, 10, 15, 30, 123456, tzinfo=timezone.utc),
+                             updated_at=datetime(2025, 5, 2, 13, 30, 0, 654321,
+                                                 tzinfo=timezone(timedelta(hours=5, minutes=30)))))
+    assert serialize_user(aware) == serialize_user(make_user(**FULL_USER))
+
+
+def test_serializer_accepts_rows():
+    row = SimpleNamespace(**{column.key: getattr(make_user(**FULL_USER), column.key)
+                             for column in User.__table__.columns})
+    assert serialize_user(row) == user_data_schema.dump(make_user(**FULL_USER))
+
+
+def test_serializer_covers_every_column():
+    assert set(serialize_user(make_user(**FULL_USER))) == {column.key for column in User.__table__.columns} - {"password"}
@@ -1,3 +1,6 @@
+import eventlet
+eventlet.monkey_patch()
+
 from src.app import app, socketio
 from src.utils import envs
 